@@ -1,12 +1,24 @@
+import os
+import json
+import time
 import streamlit as st
-from datetime import datetime
 import pandas as pd
-import plotly.graph_objects as go
-from utils.event_handler import EventHandler
-from utils.profile_generator import generate_roast_profile
-from utils.visualization import plot_roast_profile
+from st_aggrid import AgGrid, GridUpdateMode
+from utils.profile_cache import get_simulated_profile, profile_cache
+from utils.visualization import RoastFigure
+from utils.data_source import SimulatedDataSource
+from resources import (
+    archive_energy, figure_layers, get_explorer_pool, get_session_manager, load_asset, preload_analytics,
+    start_metrics_exporters
+)
+from utils.metrics import metrics
+from utils.event_handler import EventWindow
+from utils.profile_generator import ROAST_LEVELS
+from utils.roast_model import DEFAULT_FAN, DEFAULT_GAS
 import numpy as np
 
+rerun_timer = metrics.timer("roast_rerun_seconds", "Time to run the dashboard script once").start()
+
 # Set page config
 st.set_page_config(
     page_title="Coffee Roasting Dashboard",
@@ -15,16 +27,58 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize event handler
-event_handler = EventHandler()
+# Maximum points per live chart trace before downsampling
+CHART_POINT_BUDGET = 500
+
+# Events per page of the events log
+EVENT_PAGE_SIZE = 50
+
+# Row colours in the events log, by event type
+EVENT_HIGHLIGHTS = {
+    "First Crack": "#d4edda",
+    "Second Crack": "#f8d7da",
+    "Roast Started": "#cce5ff",
+    "Roast Completed": "#e2e3e5",
+}
+
+# The grid colours rows itself from event_type, so no styling runs per row in Python
+EVENT_GRID_OPTIONS = {
+    "columnDefs": [
+        {"field": "timestamp", "headerName": "Time", "width": 170},
+        {"field": "event_type", "headerName": "Event", "width": 150},
+        {"field": "details", "headerName": "Details", "flex": 1},
+    ],
+    "defaultColDef": {"resizable": True, "sortable": False},
+    "rowClassRules": {
+        f"event-{i}": f"data.event_type === {json.dumps(event)}" for i, event in enumerate(EVENT_HIGHLIGHTS)
+    },
+}
+EVENT_GRID_CSS = {
+    f".event-{i}": {"background-color": f"{color} !important"} for i, color in enumerate(EVENT_HIGHLIGHTS.values())
+}
+
+# Simulated roasts per charge temperature the outcome explorer offers
+EXPLORER_SAMPLES = [250, 500, 1000, 2000]
+
+# Most archived roasts overlaid on the chart
+HISTORY_OVERLAY_LIMIT = 200
+
+# How often the live panels refresh while roasting (seconds)
+UI_REFRESH_SECONDS = 1.0
+
+# Machines on the shop floor
+ROASTER_IDS = [f"Roaster {i}" for i in range(1, 9)]
+
+# Timings panel in the sidebar, also shown with ?debug=1 in the URL
+DEBUG_PANEL = bool(os.environ.get("ROAST_DEBUG_PANEL"))
 
-# Session state initialization
-if 'roast_data' not in st.session_state:
-    st.session_state.roast_data = pd.DataFrame(columns=['Time', 'Temperature', 'Event'])
-if 'roast_in_progress' not in st.session_state:
-    st.session_state.roast_in_progress = False
-if 'start_time' not in st.session_state:
-    st.session_state.start_time = None
+# st.fragment was called st.experimental_fragment before Streamlit 1.37
+fragment = st.fragment if hasattr(st, "fragment") else st.experimental_fragment
+
+session_manager = get_session_manager()
+start_metrics_exporters()
+
+# Session state initialization (the profile being prepared in this tab)
 if 'roast_profile' not in st.session_state:
     st.session_state.roast_profile = None
 if 'first_crack_time' not in st.session_state:
@@ -32,6 +86,8 @@ if 'first_crack_time' not in st.session_state:
 if 'second_crack_time' not in st.session_state:
     st.session_state.second_crack_time = None
 
+st.markdown(f"<style>{load_asset('style.css').decode()}</style>", unsafe_allow_html=True)
+
 # Header
 st.title("☕ Coffee Roasting Dashboard")
 st.markdown("""
@@ -42,9 +98,12 @@ st.markdown("""
 
 # Sidebar
 with st.sidebar:
-    st.image("assets/sample_beans.jpg", use_column_width=True)
+    st.image(load_asset("sample_beans.jpg"), use_column_width=True)
     st.header("Roast Parameters")
     
+    roaster_id = st.selectbox("Roaster", ROASTER_IDS)
+    event_handler = session_manager.event_handler(roaster_id)
+    
     bean_type = st.selectbox("Bean Type", ["Arabica", "Robusta", "Liberica", "Excelsa", "Blend"])
     origin = st.selectbox("Origin", ["Colombia", "Ethiopia", "Brazil", "Vietnam", "Indonesia", "Kenya", "Guatemala"])
     batch_size = st.slider("Batch Size (g)", 100, 1000, 250, 50)
@@ -57,120 +116,211 @@ with st.sidebar:
     
     charge_temp = st.slider("Charge Temperature (°C)", 150, 250, 190, 5)
     development_time = st.slider("Development Time (%)", 10, 40, 20, 1)
+    burner_power = st.slider("Burner (kW)", 1.0, 4.0, DEFAULT_GAS, 0.1)
+    fan_speed = st.slider("Fan", 0.0, 1.0, DEFAULT_FAN, 0.05)
+    profile_seed = st.number_input("Simulation Seed", min_value=0, value=0, step=1)
+    sampling_rate = st.slider("Sampling Rate (Hz)", 1, 10, 2, 1)
+    show_history = st.checkbox("Overlay past roasts (same origin and bean)")
     
     if st.button("Generate Roast Profile", key="generate_profile"):
-        st.session_state.roast_profile = generate_roast_profile(
-            bean_type, roast_level, charge_temp, development_time
+        # Target and crack times come from one heat-transfer simulation of this batch,
+        # dropped at the development time or the roast level's temperature, whichever
+        # comes first; a crack after the drop is None
+        (
+            st.session_state.roast_profile,
+            st.session_state.first_crack_time,
+            st.session_state.second_crack_time,
+        ) = get_simulated_profile(
+            bean_type, roast_level, origin, batch_size / 1000, charge_temp, development_time,
+            burner_power, fan_speed
         )
         
-        # Generate random crack times based on roast level
-        if roast_level == "Light":
-            st.session_state.first_crack_time = np.random.uniform(7.0, 9.0)
-            st.session_state.second_crack_time = None
-        elif roast_level == "Medium":
-            st.session_state.first_crack_time = np.random.uniform(6.5, 8.0)
-            st.session_state.second_crack_time = np.random.uniform(9.5, 11.0)
-        else:  # Dark, French, Italian
-            st.session_state.first_crack_time = np.random.uniform(5.5, 7.0)
-            st.session_state.second_crack_time = np.random.uniform(8.0, 9.5)
-        
         event_handler.add_event("Profile Generated", f"{bean_type} {roast_level} profile created")
-
-# Enhanced visualization function
-def plot_enhanced_roast_profile(target_profile, actual_data=None):
-    fig = go.Figure()
     
-    # Plot target profile
-    fig.add_trace(go.Scatter(
-        x=target_profile['Time'],
-        y=target_profile['Temperature'],
-        mode='lines',
-        name='Target Profile',
-        line=dict(color='#6F4E37', width=3, dash='dash'),
-        hovertemplate='Time: %{x:.1f} min<br>Temp: %{y:.1f}°C'
-    ))
+    cache_stats = profile_cache.stats()
+    st.caption(f"Profile cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
     
-    # Plot actual data if available
-    if actual_data is not None and not actual_data.empty:
-        fig.add_trace(go.Scatter(
-            x=actual_data['Time'],
-            y=actual_data['Temperature'],
-            mode='lines+markers',
-            name='Actual Temperature',
-            line=dict(color='#C4A484', width=3),
-            marker=dict(size=6, color='#6F4E37'),
-            hovertemplate='Time: %{x:.1f} min<br>Temp: %{y:.1f}°C'
-        ))
-        
-        # Mark events
-        event_data = actual_data[actual_data['Event'] != '']
-        if not event_data.empty:
-            fig.add_trace(go.Scatter(
-                x=event_data['Time'],
-                y=event_data['Temperature'],
-                mode='markers',
-                name='Events',
-                marker=dict(
-                    color='#FF0000',
-                    size=12,
-                    symbol='diamond',
-                    line=dict(width=2, color='DarkSlateGrey')
-                ),
-                text=event_data['Event'],
-                hovertemplate='<b>%{text}</b><br>Time: %{x:.1f} min<br>Temp: %{y:.1f}°C'
-            ))
-    
-    # Add roast phase annotations
-    fig.add_hrect(y0=150, y1=180, line_width=0, fillcolor="yellow", opacity=0.1, 
-                 annotation_text="Drying Phase", annotation_position="top left")
-    fig.add_hrect(y0=180, y1=210, line_width=0, fillcolor="orange", opacity=0.1, 
-                 annotation_text="Maillard Phase", annotation_position="top left")
-    fig.add_hrect(y0=210, y1=230, line_width=0, fillcolor="red", opacity=0.1, 
-                 annotation_text="Development Phase", annotation_position="top left")
-    
-    # Add predicted crack times if available
-    if st.session_state.first_crack_time:
-        fig.add_vline(x=st.session_state.first_crack_time, line_dash="dot", 
-                     line_color="green", annotation_text="Predicted 1st Crack")
-    
-    if st.session_state.second_crack_time:
-        fig.add_vline(x=st.session_state.second_crack_time, line_dash="dot", 
-                     line_color="brown", annotation_text="Predicted 2nd Crack")
+    if DEBUG_PANEL or st.query_params.get("debug"):
+        with st.expander("⏱ Timings"):
+            timings = metrics.summary()
+            if timings:
+                st.dataframe(pd.DataFrame(timings), hide_index=True, column_config={
+                    column: st.column_config.NumberColumn(format="%.2f")
+                    for column in ("mean ms", "p50 ms", "p99 ms")
+                })
+            else:
+                st.caption("Nothing timed yet")
+
+# Roast state lives in the shared engine, so any tab can follow any roaster
+roast = session_manager.get(roaster_id)
+roast_in_progress = roast is not None and roast.in_progress
+
+# An active roast is drawn against its own target, whichever tab started it
+if roast_in_progress:
+    target_profile = roast.profile
+    crack_predictions = (roast.first_crack_time, roast.second_crack_time)
+else:
+    target_profile = st.session_state.roast_profile
+    crack_predictions = (st.session_state.first_crack_time, st.session_state.second_crack_time)
+
+# Enhanced visualization function
+def plot_enhanced_roast_profile(target_profile, crack_times, telemetry=None, rate_of_rise=None):
+    """Return the tab's persistent roast figure, refreshed with live data"""
+    with metrics.timer("roast_figure_build_seconds", "Time to build or refresh the roast chart"):
+        return _roast_figure(target_profile, crack_times).update(telemetry, rate_of_rise)
+
+def _roast_figure(target_profile, crack_times):
+    roast_figure = st.session_state.get('roast_figure')
+    if roast_figure is None or not roast_figure.matches(target_profile, *crack_times):
+        roast_figure = RoastFigure(
+            target_profile, *crack_times, max_points=CHART_POINT_BUDGET, static_layers=figure_layers(*crack_times)
+        )
+        st.session_state.roast_figure = roast_figure
     
-    fig.update_layout(
-        title='Roast Profile: Target vs Actual',
-        xaxis_title='Time (minutes)',
-        yaxis_title='Temperature (°C)',
-        plot_bgcolor='rgba(240,240,240,0.9)',
-        paper_bgcolor='rgba(240,240,240,0.5)',
-        hovermode='x unified',
-        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1),
-        height=500
+    # Archived roasts are only reloaded when the matching set changes
+    history_paths = ()
+    if show_history:
+        history_paths = tuple(
+            session_manager.archive.paths(origin=origin, bean_type=bean_type)[-HISTORY_OVERLAY_LIMIT:]
+        )
+    if history_paths != roast_figure.history_key:
+        roast_figure.set_history(history_paths, [
+            session_manager.archive.load_curve(path) for path in history_paths
+        ])
+    return roast_figure
+
+live_refresh = UI_REFRESH_SECONDS if roast_in_progress else None
+
+@fragment(run_every=live_refresh)
+def live_roast_chart():
+    roast = session_manager.get(roaster_id)
+    if roast is None:
+        fig = plot_enhanced_roast_profile(target_profile, crack_predictions)
+    else:
+        with roast.lock:
+            fig = plot_enhanced_roast_profile(
+                target_profile, crack_predictions, roast.telemetry, roast.rate_of_rise
+            )
+    st.plotly_chart(fig, use_container_width=True)
+
+def show_energy(energy):
+    """Metered energy, per kg of green coffee when the batch size is known"""
+    per_kg = energy["energy_kwh_per_kg"]
+    st.metric(
+        "Energy Used", f"{energy['energy_kwh']:.2f} kWh",
+        f"{per_kg:.2f} kWh/kg" if per_kg is not None else None, delta_color="off",
+        help=f"Gas {energy['gas_kwh']:.2f} kWh ({energy['gas_m3']:.3f} m³), fan {energy['fan_kwh']:.3f} kWh"
     )
-    # Tambahkan RoR jika data aktual tersedia
-    if actual_data is not None and len(actual_data) >= 2:
-        actual_data_sorted = actual_data.sort_values("Time")
-        ror_values = np.gradient(actual_data_sorted['Temperature'], actual_data_sorted['Time'])  # RoR: ΔT/Δt
-        fig.add_trace(go.Scatter(
-            x=actual_data_sorted['Time'],
-            y=ror_values,
-            mode='lines',
-            name='Rate of Rise (°C/min)',
-            yaxis='y2',
-            line=dict(color='blue', width=2, dash='dot'),
-            hovertemplate='Time: %{x:.1f} min<br>RoR: %{y:.1f}°C/min'
-        ))
-        fig.update_layout(
-            yaxis2=dict(
-                title='Rate of Rise (°C/min)',
-                overlaying='y',
-                side='right',
-                showgrid=False
+
+@fragment(run_every=live_refresh)
+def live_roast_readings():
+    roast = session_manager.get(roaster_id)
+    with roast.lock:
+        if roast.telemetry.empty:
+            return
+        current_temp = roast.telemetry.temperature[-1]
+        first_crack = roast.telemetry.has_event("First Crack")
+        second_crack = roast.telemetry.has_event("Second Crack")
+        # Copied so the search below doesn't hold up ingest
+        time_, temperature = roast.telemetry.time.copy(), roast.telemetry.temperature.copy()
+        energy = roast.energy.totals()
+    similar = session_manager.roast_index.query(time_, temperature, k=3)
+    st.metric("Current Temperature", f"{current_temp:.1f}°C")
+    st.metric("Elapsed Time", f"{roast.elapsed_minutes():.1f} minutes")
+    show_energy(energy)
+    if second_crack:
+        st.success("🔥🔥 Second Crack detected!")
+    elif first_crack:
+        st.success("🔥 First Crack detected!")
+    if not session_manager.roast_index.ready.is_set():
+        st.caption("Indexing past roasts...")
+    if similar:
+        st.caption("Closest past roasts so far")
+        st.dataframe(pd.DataFrame([{
+            "Started": pd.Timestamp(metadata["start_time"]).strftime("%Y-%m-%d %H:%M")
+            if metadata.get("start_time") else "",
+            "Origin": metadata.get("origin"),
+            "Bean": metadata.get("bean_type"),
+            "Level": metadata.get("roast_level"),
+            "RMS Δ (°C)": distance,
+        } for _, distance, metadata in similar]), hide_index=True, use_container_width=True)
+
+@fragment(run_every=UI_REFRESH_SECONDS if session_manager.machines(active=True) else None)
+def shop_floor():
+    rows = []
+    for machine_id in session_manager.machines():
+        session = session_manager.get(machine_id)
+        with session.lock:
+            telemetry = session.telemetry
+            rows.append({
+                "Roaster": machine_id,
+                "Status": "Roasting" if session.in_progress else "Finished",
+                "Elapsed (min)": session.elapsed_minutes(),
+                "Temperature (°C)": telemetry.temperature[-1] if not telemetry.empty else None,
+                "RoR (°C/min)": session.rate_of_rise.latest,
+            })
+    if rows:
+        st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+    else:
+        st.info("No roasters running")
+
+def outcome_explorer():
+    """Monte Carlo outcomes of the sidebar's roast over charge temperature and development time"""
+    from utils.analysis import FLAVOR_BANDS
+    from utils.monte_carlo import explore_outcomes
+    from utils.visualization import plot_outcome_heatmap
+
+    range_col, samples_col = st.columns([3, 1])
+    with range_col:
+        charge_range = st.slider("Charge Temperatures (°C)", 150, 250, (170, 220), 5, key="explore_charge")
+        development_range = st.slider("Development Times (%)", 10, 40, (10, 40), 2, key="explore_development")
+    with samples_col:
+        samples = st.select_slider("Roasts per Cell", EXPLORER_SAMPLES, 1000, key="explore_samples")
+    if st.button("Run Monte Carlo", key="explore_run"):
+        with st.spinner("Simulating roasts..."):
+            start = time.perf_counter()
+            st.session_state.outcomes = explore_outcomes(
+                bean_type, origin, batch_size / 1000,
+                np.arange(charge_range[0], charge_range[1] + 1, 5),
+                np.arange(development_range[0], development_range[1] + 1, 2),
+                gas=burner_power, fan=fan_speed, samples=samples, seed=int(profile_seed),
+                pool=get_explorer_pool()
             )
-        )
+            st.session_state.outcomes_settings = (
+                f"{bean_type} from {origin}, {batch_size} g, burner {burner_power:.1f} kW, fan {fan_speed:.2f}"
+            )
+            st.session_state.outcomes_seconds = time.perf_counter() - start
 
-    
-    return fig
+    outcomes = st.session_state.get('outcomes')
+    if outcomes is None:
+        st.caption("Simulates noisy roasts of the sidebar settings for each charge temperature and development time")
+        return
+
+    views = {
+        "First Crack (min)": ("first_crack", None),
+        "Final Temperature (°C)": ("final_temp", None),
+        "Roast Duration (min)": ("duration", None),
+        "Second Crack Before Drop (share)": ("second_crack", "reached"),
+    }
+    views.update({f"{flavor.name} (share)": (flavor.name, "flavor") for _, flavor in FLAVOR_BANDS})
+    view = st.selectbox("Show", list(views), key="explore_view")
+    outcome, kind = views[view]
+    if kind == "reached":
+        values, spread = outcomes.reached(outcome), None
+    elif kind == "flavor":
+        values, spread = outcomes.flavor_share(outcome), None
+    else:
+        # Median, with the 10th to 90th percentile on hover
+        values = outcomes.quantile(outcome, 0.5)
+        spread = (outcomes.quantile(outcome, 0.1), outcomes.quantile(outcome, 0.9))
+    st.plotly_chart(
+        plot_outcome_heatmap(outcomes, values, view, spread, current=(development_time, charge_temp)),
+        use_container_width=True
+    )
+    st.caption(
+        f"{outcomes.samples} simulated roasts per cell of {st.session_state.outcomes_settings}, "
+        f"{outcomes.flavor.size} in all, in {st.session_state.outcomes_seconds:.1f} s"
+    )
 
 # Main content
 col1, col2 = st.columns([2, 1])
@@ -178,48 +328,42 @@ col1, col2 = st.columns([2, 1])
 with col1:
     st.header("Roast Profile Visualization")
     
-    if st.session_state.roast_profile is not None:
-        fig = plot_enhanced_roast_profile(
-            st.session_state.roast_profile,
-            st.session_state.roast_data if not st.session_state.roast_data.empty else None
-        )
-        st.plotly_chart(fig, use_container_width=True)
+    if target_profile is not None:
+        live_roast_chart()
         # === Fitur Tambahan ===
         st.subheader("🔎 Additional Roast Insights")
+        from utils.analysis import predict_flavor
 
-        # Estimasi konsumsi energi
-        if not st.session_state.roast_in_progress and st.session_state.start_time:
-            total_minutes = (datetime.now() - st.session_state.start_time).total_seconds() / 60
-            power_kw = 2.5  # asumsi daya
-            energy_used = (power_kw * total_minutes) / 60  # kWh
-            st.metric("Estimated Energy Used", f"{energy_used:.2f} kWh")
+        # Konsumsi energi
+        if roast is not None and not roast_in_progress:
+            with roast.lock:
+                energy = roast.energy.totals()
+            show_energy(energy)
 
         # Prediksi rasa
-        if st.session_state.roast_profile is not None:
-            duration = st.session_state.roast_profile['Time'].iloc[-1]
+        if target_profile is not None:
+            flavor = predict_flavor(target_profile['Time'].iloc[-1])
             st.subheader("☕ Predicted Flavor Profile")
-            if duration <= 8:
-                st.info("Predicted: **Bright and acidic** - Possibly underdeveloped")
-            elif duration <= 11:
-                st.info("Predicted: **Balanced and sweet** - Good development")
-            else:
-                st.warning("Predicted: **Bitter and smoky** - Possibly overdeveloped")
+            show = st.warning if flavor.warning else st.info
+            show(f"Predicted: **{flavor.name}** - {flavor.note}")
 
         # Download laporan
-        if not st.session_state.roast_data.empty:
+        if roast is not None and not roast.telemetry.empty:
+            with roast.lock:
+                report = roast.telemetry.to_csv()
             st.download_button(
                 label="📄 Download CSV Report",
-                data=st.session_state.roast_data.to_csv(index=False),
+                data=report,
                 file_name='roast_report.csv',
                 mime='text/csv'
             )
 
         
         # Display crack predictions
-        if st.session_state.first_crack_time:
-            st.info(f"**Predicted First Crack**: {st.session_state.first_crack_time:.1f} minutes")
-        if st.session_state.second_crack_time:
-            st.info(f"**Predicted Second Crack**: {st.session_state.second_crack_time:.1f} minutes")
+        if crack_predictions[0]:
+            st.info(f"**Predicted First Crack**: {crack_predictions[0]:.1f} minutes")
+        if crack_predictions[1]:
+            st.info(f"**Predicted Second Crack**: {crack_predictions[1]:.1f} minutes")
     else:
         st.info("Generate a roast profile using the sidebar controls to begin")
     
@@ -228,154 +372,133 @@ with col1:
     control_col1, control_col2, control_col3 = st.columns(3)
     
     with control_col1:
-        if st.button("Start Roast", disabled=st.session_state.roast_in_progress or st.session_state.roast_profile is None):
-            st.session_state.roast_in_progress = True
-            st.session_state.start_time = datetime.now()
-            st.session_state.roast_data = pd.DataFrame(columns=['Time', 'Temperature', 'Event'])
+        if st.button("Start Roast", disabled=roast_in_progress or st.session_state.roast_profile is None):
+            # Simulated roaster probes playing back the target profile
+            session_manager.start_roast(
+                roaster_id,
+                SimulatedDataSource(
+                    roaster_id, st.session_state.roast_profile, rate_hz=sampling_rate, seed=int(profile_seed)
+                ),
+                st.session_state.roast_profile,
+                st.session_state.first_crack_time,
+                st.session_state.second_crack_time,
+                bean_type=bean_type,
+                origin=origin,
+                roast_level=roast_level,
+                batch_size=batch_size,
+                charge_temp=charge_temp,
+                development_time=development_time,
+                burner_power=burner_power,
+                fan_speed=fan_speed,
+                seed=int(profile_seed)
+            )
             event_handler.add_event("Roast Started", f"Batch: {batch_size}g {bean_type} from {origin}")
+            st.rerun()
     
     with control_col2:
-        if st.button("Add Event", disabled=not st.session_state.roast_in_progress):
+        if st.button("Add Event", disabled=not roast_in_progress):
             event_type = st.selectbox("Event Type", ["First Crack", "Second Crack", "Fan Adjustment", "Gas Adjustment", "Other"])
             event_note = st.text_input("Event Notes")
             if st.button("Confirm Event"):
-                current_time = (datetime.now() - st.session_state.start_time).total_seconds() / 60
-                current_temp = st.session_state.roast_profile.iloc[
-                    min(int(current_time * 2), len(st.session_state.roast_profile)-1)
-                ]['Temperature']
-                
-                event_handler.add_event(event_type, event_note)
-                
-                # Update roast data with event
-                new_event = pd.DataFrame({
-                    'Time': [current_time],
-                    'Temperature': [current_temp],
-                    'Event': [event_type]
-                })
-                st.session_state.roast_data = pd.concat([st.session_state.roast_data, new_event])
-                st.success(f"Event '{event_type}' added at {current_time:.1f} min!")
+                # Logs the event and marks it on the latest reading
+                roast.add_event(event_type, event_note)
+                st.success(f"Event '{event_type}' added at {roast.elapsed_minutes():.1f} min!")
     
     with control_col3:
-        if st.button("End Roast", disabled=not st.session_state.roast_in_progress):
-            st.session_state.roast_in_progress = False
-            duration = datetime.now() - st.session_state.start_time
-            event_handler.add_event("Roast Completed", f"Duration: {duration.total_seconds()/60:.1f} minutes")
+        if st.button("End Roast", disabled=not roast_in_progress):
+            # Also logs "Roast Completed" with the duration
+            session_manager.end_roast(roaster_id)
+            st.rerun()
     
-    if st.session_state.roast_in_progress:
+    if roast_in_progress:
         st.warning("Roast in progress - monitor temperature and events carefully!")
         
-        # Simulate temperature readings
-        if st.session_state.roast_profile is not None:
-            current_time = (datetime.now() - st.session_state.start_time).total_seconds() / 60
-            current_temp = st.session_state.roast_profile.iloc[
-                min(int(current_time * 2), len(st.session_state.roast_profile)-1)
-            ]['Temperature']
-            
-            # Auto-detect first crack
-            if (st.session_state.first_crack_time and 
-                not any(st.session_state.roast_data['Event'] == "First Crack") and
-                current_time >= st.session_state.first_crack_time):
-                
-                event_handler.add_event("First Crack", "Automatically detected")
-                new_event = pd.DataFrame({
-                    'Time': [current_time],
-                    'Temperature': [current_temp],
-                    'Event': ["First Crack"]
-                })
-                st.session_state.roast_data = pd.concat([st.session_state.roast_data, new_event])
-                st.success("🔥 First Crack detected automatically!")
-            
-            # Auto-detect second crack
-            if (st.session_state.second_crack_time and 
-                not any(st.session_state.roast_data['Event'] == "Second Crack") and
-                current_time >= st.session_state.second_crack_time):
-                
-                event_handler.add_event("Second Crack", "Automatically detected")
-                new_event = pd.DataFrame({
-                    'Time': [current_time],
-                    'Temperature': [current_temp],
-                    'Event': ["Second Crack"]
-                })
-                st.session_state.roast_data = pd.concat([st.session_state.roast_data, new_event])
-                st.success("🔥🔥 Second Crack detected automatically!")
-            
-            st.metric("Current Temperature", f"{current_temp:.1f}°C")
-            st.metric("Elapsed Time", f"{current_time:.1f} minutes")
-            
-            # Update roast data
-            new_data = pd.DataFrame({
-                'Time': [current_time],
-                'Temperature': [current_temp],
-                'Event': ['']
-            })
-            st.session_state.roast_data = pd.concat([st.session_state.roast_data, new_data])
+        # The sidebar's burner and fan sliders also steer the running roast
+        if (burner_power, fan_speed) != (roast.burner_power, roast.fan_speed):
+            if st.button(f"Apply Burner {burner_power:.1f} kW / Fan {fan_speed:.2f}"):
+                roast.set_controls(burner_power, fan_speed)
+        
+        live_roast_readings()
+    
+    with st.expander("🏭 Shop Floor", expanded=False):
+        shop_floor()
+    
+    with st.expander("⚡ Energy by Roaster and Shift", expanded=False):
+        roast_energy = archive_energy(session_manager.archive.root, session_manager.archive.saved)
+        if roast_energy.empty:
+            st.info("No archived roasts yet")
+        else:
+            from utils.energy import energy_report, least_efficient_profiles
+            st.dataframe(energy_report(roast_energy), hide_index=True, use_container_width=True)
+            st.caption("Least efficient profiles (kWh per kg of green coffee)")
+            st.dataframe(least_efficient_profiles(roast_energy), hide_index=True, use_container_width=True)
+    
+    with st.expander("🎲 Outcome Explorer", expanded=False):
+        outcome_explorer()
 
 with col2:
     st.header("Roast Events Log")
-    events_df = event_handler.get_events_df()
+    events_timer = metrics.timer("roast_events_render_seconds", "Time to query and render the events log").start()
+    # Each tab keeps one page per roaster and only fetches what's new
+    event_windows = st.session_state.setdefault('event_windows', {})
+    event_window = event_windows.get(roaster_id)
+    if event_window is None or event_window.handler is not event_handler:
+        event_window = event_windows[roaster_id] = EventWindow(event_handler, EVENT_PAGE_SIZE)
+    events_page = st.session_state.get('events_page', 1)
+    events_df = event_window.refresh(events_page - 1)
+    if events_page > event_window.pages:
+        # The log got shorter (cleared, or another roaster) since the page was picked
+        events_page = event_window.pages
+        events_df = event_window.refresh(events_page - 1)
+        st.session_state.events_page = events_page
     
-    if not events_df.empty:
-        # Highlight important events
-        def highlight_events(row):
-            if row['event_type'] == "First Crack":
-                return ['background-color: #d4edda'] * len(row)
-            elif row['event_type'] == "Second Crack":
-                return ['background-color: #f8d7da'] * len(row)
-            elif row['event_type'] == "Roast Started":
-                return ['background-color: #cce5ff'] * len(row)
-            elif row['event_type'] == "Roast Completed":
-                return ['background-color: #e2e3e5'] * len(row)
-            else:
-                return [''] * len(row)
-        
-        st.dataframe(
-            events_df.style.apply(highlight_events, axis=1),
-            column_config={
-                "timestamp": "Time",
-                "event_type": "Event",
-                "details": "Details"
-            },
-            hide_index=True,
-            use_container_width=True,
-            height=400
+    if event_window.total:
+        AgGrid(
+            events_df.assign(timestamp=events_df['timestamp'].dt.strftime("%Y-%m-%d %H:%M:%S")),
+            gridOptions=EVENT_GRID_OPTIONS,
+            custom_css=EVENT_GRID_CSS,
+            height=400,
+            update_mode=GridUpdateMode.NO_UPDATE,
+            enable_enterprise_modules=False,
+            key=f"events_grid_{roaster_id}",
         )
         
-        if st.button("Clear Events"):
+        page_col, count_col, clear_col = st.columns([1, 2, 1])
+        if event_window.pages > 1:
+            page_col.number_input("Page", min_value=1, max_value=event_window.pages, key="events_page")
+        count_col.caption(f"{event_window.total} events, newest first")
+        if clear_col.button("Clear Events"):
             event_handler.clear_events()
     else:
         st.info("No events recorded yet")
+    events_timer.stop()
     
     st.header("Roast Statistics")
     
-    if not st.session_state.roast_data.empty:
-        latest_temp = st.session_state.roast_data['Temperature'].iloc[-1]
-        max_temp = st.session_state.roast_data['Temperature'].max()
-        
-        # Calculate rate of rise
-        if len(st.session_state.roast_data) > 5:
-            last_30s = st.session_state.roast_data.iloc[-5:]
-            ror = (last_30s['Temperature'].iloc[-1] - last_30s['Temperature'].iloc[0]) / 0.5  # °C/min
-        
-        # Get event times
-        first_crack_time = None
-        second_crack_time = None
-        
-        if not events_df.empty:
-            if "First Crack" in events_df['event_type'].values:
-                first_crack_row = events_df[events_df['event_type'] == "First Crack"].iloc[0]
-                first_crack_time = (first_crack_row['timestamp'] - pd.to_datetime(st.session_state.start_time)).total_seconds() / 60
+    if roast is not None and not roast.telemetry.empty:
+        with roast.lock:
+            temperatures = roast.telemetry.temperature
+            latest_temp = temperatures[-1]
+            max_temp = temperatures.max()
+            
+            # Rate of rise from the streaming calculator
+            ror = roast.rate_of_rise.latest
             
-            if "Second Crack" in events_df['event_type'].values:
-                second_crack_row = events_df[events_df['event_type'] == "Second Crack"].iloc[0]
-                second_crack_time = (second_crack_row['timestamp'] - pd.to_datetime(st.session_state.start_time)).total_seconds() / 60
+            # Get event times from the telemetry's event index
+            first_crack = roast.telemetry.first_event("First Crack")
+            second_crack = roast.telemetry.first_event("Second Crack")
+            first_crack_time = first_crack[0] if first_crack else None
+            second_crack_time = second_crack[0] if second_crack else None
         
         # Display metrics
         col_stat1, col_stat2 = st.columns(2)
         col_stat1.metric("Current Temp", f"{latest_temp:.1f}°C")
         col_stat1.metric("Peak Temp", f"{max_temp:.1f}°C")
         
-        if 'ror' in locals():
+        if ror is not None:
             col_stat2.metric("Rate of Rise", f"{ror:.1f}°C/min")
+            if roast_in_progress and ror < 0:
+                st.warning("Rate of Rise is negative - the roast may be stalling")
         
         if first_crack_time:
             col_stat2.metric("1st Crack Time", f"{first_crack_time:.1f} min")
@@ -385,6 +508,14 @@ with col2:
     st.header("Roast Recommendations")
     
     if st.session_state.roast_profile is not None:
+        # The target drops at the development time if that comes before the level's temperature
+        drop_temp = st.session_state.roast_profile['Temperature'].iloc[-1]
+        level_temp = ROAST_LEVELS[roast_level][0]
+        if drop_temp < level_temp - 1:
+            st.caption(
+                f"At {development_time}% development this target drops at {drop_temp:.0f}°C, "
+                f"short of {roast_level} ({level_temp}°C); raise the development time to reach it"
+            )
         if roast_level == "Light":
             st.info("""
             **Light Roast Tips**:
@@ -414,3 +545,6 @@ st.markdown("""
         <p>Coffee Roasting Dashboard v2.0 | Enhanced Roast Simulation</p>
     </div>
 """, unsafe_allow_html=True)
+
+preload_analytics()
+rerun_timer.stop()
@@ -0,0 +1,111 @@
+"""Replay recorded roasts through the crack detector and score it
+
+Roasts come from the heat-transfer model, read through a lagging, noisy
+probe. Each roast's beans crack a few degrees off their type's nominal
+crack temperature, as lots do, and the synthesized crack pops start when
+they actually do; the first pop of each crack is the ground truth, so it
+is not derived from the temperatures the detector assumes. Each roast is
+replayed with the probe alone (with and without the RoR term), with the
+model's (perturbed) crack-time prediction, and with a synthetic
+microphone recording.
+
+Run from the repository root:
+    python -m benchmarks.crack_detector [roasts]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from utils.crack_detector import AcousticFileSource, CrackDetector, crack_pop_times, write_pops_wav
+from utils.roast_model import BEAN_PROPERTIES, crossing_times, predict_crack_times, simulate_roasts
+
+RATE_HZ = 2.0
+PROBE_LAG = 20 / 60  # minutes
+PROBE_NOISE = 0.3
+TOLERANCE = 0.5  # minutes either side of the true crack that count as a hit
+CRACK_SPREAD = 3.0  # °C, lot-to-lot standard deviation of the crack temperatures
+
+
+def record(result, i, rng):
+    """Probe readings (minutes, °C) for one simulated roast"""
+    times = np.arange(0, result["time"][-1], 1 / (60 * RATE_HZ))
+    bean = np.interp(times, result["time"], result["bean"][i])
+    probe = np.empty_like(bean)
+    alpha = 1 - np.exp(-(1 / (60 * RATE_HZ)) / PROBE_LAG)
+    reading = bean[0]
+    for j, value in enumerate(bean):
+        reading += alpha * (value - reading)
+        probe[j] = reading
+    return times, probe + rng.normal(0, PROBE_NOISE, size=len(probe))
+
+
+def replay(times, probe, detector, acoustic=None):
+    cost = time.perf_counter()
+    for t, temperature in zip(times, probe):
+        detector.update(t, temperature, acoustic.pops_until(t) if acoustic is not None else None)
+    cost = time.perf_counter() - cost
+    return {event: t for event, t, _ in detector.detections}, cost / len(times)
+
+
+def main(roasts=50):
+    rng = np.random.default_rng(0)
+    offsets = rng.normal(0, CRACK_SPREAD, roasts)
+    result = simulate_roasts(
+        "Arabica", "Colombia", rng.uniform(0.15, 0.6, roasts), rng.uniform(180, 215, roasts),
+        gas=rng.uniform(1.8, 3.0, roasts), fan=rng.uniform(0.2, 0.6, roasts), duration=20, points=2401,
+        crack_offsets=offsets,
+    )
+    crack_temps = (BEAN_PROPERTIES["Arabica"]["first_crack"], BEAN_PROPERTIES["Arabica"]["second_crack"])
+    starts = [crossing_times(result["time"], result["bean"], temp + offsets) for temp in crack_temps]
+    # What the roast model predicts for these roasts, knowing only the nominal temperatures
+    predicted = predict_crack_times(result, "Arabica")
+
+    modes = ("probe", "probe, no RoR", "probe + prediction", "probe + acoustic")
+    errors = {mode: {0: [], 1: []} for mode in modes}
+    costs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(roasts):
+            times, probe = record(result, i, rng)
+            pops = [crack_pop_times(start[i], seed=2 * i + stage) if not np.isnan(start[i]) else np.empty(0)
+                    for stage, start in enumerate(starts)]
+            pops[1] = pops[1][pops[1] < times[-1]]
+            truth = [stage_pops[0] if len(stage_pops) else np.nan for stage_pops in pops]
+            # A prediction off by ~30 s more, as from the roast model on a real machine
+            expected = [t[i] + rng.normal(0, 0.5) if not np.isnan(t[i]) else None for t in predicted]
+            path = os.path.join(tmp, f"{i}.wav")
+            write_pops_wav(path, np.concatenate(pops), duration=times[-1], sample_rate=4000, seed=i)
+
+            for mode in modes:
+                acoustic = AcousticFileSource(path) if mode == "probe + acoustic" else None
+                detector = CrackDetector(
+                    expected_times=expected if mode == "probe + prediction" else (None, None),
+                    weights={"ror": 0.0} if mode == "probe, no RoR" else None,
+                )
+                detected, cost = replay(times, probe, detector, acoustic)
+                costs.append(cost)
+                if acoustic is not None:
+                    acoustic.close()
+                for stage, event in enumerate(("First Crack", "Second Crack")):
+                    actual = truth[stage]
+                    found = detected.get(event)
+                    if np.isnan(actual):
+                        errors[mode][stage].append(np.inf if found is not None else np.nan)
+                    else:
+                        errors[mode][stage].append(found - actual if found is not None else np.inf)
+
+    print(f"{roasts} roasts, {1e6 * np.mean(costs):.1f} µs per sample")
+    for mode in modes:
+        for stage, event in enumerate(("First Crack", "Second Crack")):
+            error = np.array(errors[mode][stage]) * 60
+            error = error[~np.isnan(error)]
+            finite = error[np.isfinite(error)]
+            hits = np.abs(error) <= TOLERANCE * 60
+            print(f"{mode:<19} {event:<13} hit rate {hits.mean():5.0%}   "
+                  f"latency p50 {np.median(finite):+6.1f} s   p90 |err| {np.percentile(np.abs(finite), 90):5.1f} s")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
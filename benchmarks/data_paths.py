@@ -0,0 +1,192 @@
+"""Time the dashboard's data paths at long-roast and shop-floor scale
+
+Cases are named after what they time and each is run best of three:
+profile generation, telemetry append, RoR (streaming and vectorized),
+the roast chart refresh and its serialization as st.plotly_chart sends
+it, the events log query and paged window, and the Monte Carlo outcome
+explorer on a warm pool. Event log data goes to a temporary directory.
+
+Run from the repository root, optionally only the cases matching a
+substring and with a different telemetry length:
+    python -m benchmarks.data_paths [filter] [samples]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import plotly.io
+
+from utils.event_handler import EventHandler, EventWindow
+from utils.event_store import EventStore
+from utils.monte_carlo import default_pool, explore_outcomes
+from utils.profile_generator import generate_roast_profile
+from utils.ror import RateOfRise, rate_of_rise
+from utils.telemetry import TelemetryBuffer
+from utils.visualization import RoastFigure
+
+EVENT_TYPES = ["Temperature Check", "Gas Adjusted", "First Crack", "Second Crack", "Roast Completed"]
+
+
+def best_of(func, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def roast_curve(samples, rate_hz=10.0):
+    time_ = np.arange(samples) / rate_hz / 60
+    temperature = 25 + 200 * (1 - np.exp(-time_ / 4)) + np.random.default_rng(0).normal(0, 0.3, samples)
+    return time_, temperature
+
+
+def filled_buffer(samples):
+    telemetry = TelemetryBuffer()
+    for i, (t, temperature) in enumerate(zip(*roast_curve(samples))):
+        telemetry.append(t, temperature, "First Crack" if i == samples * 3 // 4 else "")
+    return telemetry
+
+
+def time_generate_roast_profile(samples):
+    calls = 200
+    seconds = best_of(lambda: [generate_roast_profile("Arabica", "Medium", 190, 20, seed=i) for i in range(calls)])
+    return seconds / calls, "per profile"
+
+
+def time_telemetry_append(samples):
+    time_, temperature = roast_curve(samples)
+    time_, temperature = time_.tolist(), temperature.tolist()
+
+    def append():
+        telemetry = TelemetryBuffer()
+        for t, temperature_ in zip(time_, temperature):
+            telemetry.append(t, temperature_)
+    return best_of(append), f"{samples} samples"
+
+
+def time_telemetry_append_bounded(samples):
+    time_, temperature = roast_curve(samples)
+    time_, temperature = time_.tolist(), temperature.tolist()
+
+    def append():
+        telemetry = TelemetryBuffer(max_samples=samples // 8)
+        for t, temperature_ in zip(time_, temperature):
+            telemetry.append(t, temperature_)
+    return best_of(append), f"{samples} samples into {samples // 8}"
+
+
+def time_ror_streaming(samples):
+    telemetry = filled_buffer(samples)
+    return best_of(lambda: RateOfRise().sync(telemetry)), f"{samples} samples"
+
+
+def time_ror_vectorized(samples):
+    time_, temperature = roast_curve(samples)
+    return best_of(lambda: rate_of_rise(time_, temperature)), f"{samples} samples"
+
+
+def _live_figure(samples):
+    telemetry = filled_buffer(samples)
+    ror = RateOfRise()
+    ror.sync(telemetry)
+    profile = generate_roast_profile("Arabica", "Medium", 190, 20, seed=0)
+    return RoastFigure(profile, 9.0, 12.0), telemetry, ror
+
+
+def time_figure_update(samples):
+    figure, telemetry, ror = _live_figure(samples)
+    return best_of(lambda: figure.update(telemetry, ror)), f"{samples} samples, {figure.max_points} points/trace"
+
+
+def time_figure_serialize(samples):
+    figure, telemetry, ror = _live_figure(samples)
+    figure.update(telemetry, ror)
+    seconds = best_of(lambda: plotly.io.to_json(figure.fig, validate=False))
+    return seconds, f"{len(plotly.io.to_json(figure.fig, validate=False)) / 1024:.0f} KiB"
+
+
+def time_figure_serialize_history(samples):
+    figure, telemetry, ror = _live_figure(samples)
+    curves = [({}, *roast_curve(samples // 4)) for _ in range(200)]
+    figure.set_history("history", curves)
+    figure.update(telemetry, ror)
+    seconds = best_of(lambda: plotly.io.to_json(figure.fig, validate=False))
+    return seconds, f"{len(plotly.io.to_json(figure.fig, validate=False)) / 1024:.0f} KiB, 200 past roasts"
+
+
+def _event_store(directory, events, machines):
+    store = EventStore(os.path.join(directory, "events.db"))
+    rng = np.random.default_rng(0)
+    start = datetime.now() - timedelta(days=30)
+    store.append_many(
+        (EVENT_TYPES[rng.integers(len(EVENT_TYPES))], "benchmark", f"roast-{i // 50}",
+         f"Roaster {i % machines + 1}", start + timedelta(seconds=20 * i))
+        for i in range(events)
+    )
+    return store
+
+
+def time_get_events_df(samples, events=100_000, machines=8):
+    with tempfile.TemporaryDirectory() as tmp:
+        store = _event_store(tmp, events, machines)
+        handler = EventHandler(store, "Roaster 1")
+        seconds = best_of(lambda: handler.get_events_df(limit=500))
+        store.close()
+    return seconds, f"latest 500 of {events // machines} for one machine, {events} stored"
+
+
+def time_event_window_refresh(samples, events=100_000, machines=8):
+    with tempfile.TemporaryDirectory() as tmp:
+        store = _event_store(tmp, events, machines)
+        handler = EventHandler(store, "Roaster 1")
+        window = EventWindow(handler)
+        window.refresh()
+
+        def refresh():
+            handler.add_event("Temperature Check")
+            window.refresh()
+            window.refresh()
+        seconds = best_of(refresh)
+        store.close()
+    return seconds, f"one new event then none, page of {window.page_size}, {events} stored"
+
+
+def time_explore_outcomes(samples, per_cell=1000):
+    charge_temps, development_times = np.arange(170, 225, 5), np.arange(10, 42, 2)
+    with default_pool() as pool:
+        seconds = best_of(lambda: explore_outcomes(
+            "Arabica", "Colombia", 0.25, charge_temps, development_times, samples=per_cell, seed=0, pool=pool
+        ))
+    return seconds, f"{len(charge_temps)} x {len(development_times)} cells of {per_cell}, {os.cpu_count()} workers"
+
+
+CASES = [
+    time_generate_roast_profile,
+    time_telemetry_append,
+    time_telemetry_append_bounded,
+    time_ror_streaming,
+    time_ror_vectorized,
+    time_figure_update,
+    time_figure_serialize,
+    time_figure_serialize_history,
+    time_get_events_df,
+    time_event_window_refresh,
+    time_explore_outcomes,
+]
+
+
+def main(pattern="", samples=36000):
+    for case in CASES:
+        name = case.__name__[len("time_"):]
+        if pattern in name:
+            seconds, note = case(int(samples))
+            print(f"{name:<28} {seconds * 1000:9.3f} ms   {note}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,30 @@
+"""Measure simulated probe throughput through the DataSourcePool
+
+Run from the repository root:
+    python -m benchmarks.data_source [devices] [rate_hz] [seconds]
+"""
+import sys
+import time
+
+from utils.data_source import DataSourcePool, SimulatedDataSource
+
+
+def main(devices=8, rate_hz=1000.0, seconds=3.0):
+    received = {}
+    with DataSourcePool() as pool:
+        for i in range(devices):
+            pool.add(SimulatedDataSource(f"roaster-{i + 1}", rate_hz=rate_hz, time_scale=60, seed=i))
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            for device_id, readings in pool.read_all(timeout=0.05).items():
+                received[device_id] = received.get(device_id, 0) + len(readings)
+        throughput = pool.throughput()
+
+    print(f"{'device':<12} {'samples':>8} {'samples/s':>10}")
+    for device_id in sorted(throughput):
+        print(f"{device_id:<12} {received.get(device_id, 0):>8} {throughput[device_id]:>10.1f}")
+    print(f"{'total':<12} {sum(received.values()):>8} {sum(throughput.values()):>10.1f}")
+
+
+if __name__ == "__main__":
+    main(*(float(arg) if i else int(arg) for i, arg in enumerate(sys.argv[1:])))
@@ -0,0 +1,81 @@
+"""Headless load test: dashboard rerun latency against concurrent roasts
+
+Each simulated client is an AppTest session that picks its own roaster,
+generates a profile and starts a roast at 10 Hz, the way an operator
+would. Roasts then run concurrently on the shared session manager while
+every client keeps rerunning the dashboard for its roaster. AppTest runs
+one script at a time per process, so the clients take turns; the roasts'
+ingest threads keep running underneath them. Only the script's own
+execution is timed, as in benchmarks.startup. Event log and archive go
+to a temporary directory.
+
+Run from the repository root:
+    python -m benchmarks.load [seconds per level]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.startup import APP, report, timed_exec
+
+# Concurrent roasts per level; the dashboard has 8 roasters
+ROAST_COUNTS = (1, 2, 4, 8)
+
+
+def _widget(elements, label):
+    return next(element for element in elements if element.label == label)
+
+
+def start_client(roaster_id, rate_hz=10):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP, default_timeout=60).run()
+    _widget(at.selectbox, "Roaster").set_value(roaster_id)
+    _widget(at.slider, "Sampling Rate (Hz)").set_value(rate_hz)
+    at.button(key="generate_profile").click().run()
+    _widget(at.button, "Start Roast").click().run()
+    assert not at.exception, at.exception
+    return at
+
+
+def run_level(clients, timings, seconds):
+    del timings[:]
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for at in clients:
+            at.run()
+    for at in clients:
+        assert not at.exception, at.exception
+    return np.array(timings)
+
+
+def main(seconds=10.0):
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["ROAST_EVENT_DB"] = os.path.join(tmp, "events.db")
+        os.environ["ROAST_ARCHIVE"] = os.path.join(tmp, "archive")
+
+        from streamlit.runtime.scriptrunner import script_runner
+
+        from utils.metrics import metrics
+
+        timings = []
+        script_runner.exec = timed_exec(timings)
+        clients = []
+        for roasts in ROAST_COUNTS:
+            while len(clients) < roasts:
+                clients.append(start_client(f"Roaster {len(clients) + 1}"))
+            report(f"{roasts} roasts, {len(clients)} clients", run_level(clients, timings, seconds))
+
+        print()
+        for row in metrics.summary():
+            print(f"{row['metric']:<34} n={row['count']:<7} "
+                  f"p50 {row['p50 ms']:7.2f} ms   p99 {row['p99 ms']:7.2f} ms")
+        for at in clients:
+            _widget(at.button, "End Roast").click().run()
+
+
+if __name__ == "__main__":
+    main(*(float(arg) for arg in sys.argv[1:]))
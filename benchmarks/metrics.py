@@ -0,0 +1,56 @@
+"""Measure the overhead of the timing hooks against the work they time
+
+The cheapest instrumented block is RoastSession.ingest of a batch of one
+probe reading, which SessionManager runs through its worker pool; every
+other hook wraps far more work (a figure refresh, a table render, a whole
+rerun). Run from the repository root:
+    python -m benchmarks.metrics [iterations]
+"""
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from utils.data_source import Reading
+from utils.metrics import Histogram
+from utils.session_manager import INGEST_SAMPLE, INGEST_SECONDS, RoastSession
+
+
+def per_call(block, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        block()
+    return (time.perf_counter() - start) / iterations
+
+
+def hook_cost(iterations, sample=1):
+    histogram = Histogram("benchmark_seconds", sample=sample)
+    return per_call(lambda: histogram.stop(histogram.start()), iterations) - per_call(lambda: None, iterations)
+
+
+def ingest_cost(iterations, executor=None):
+    session = RoastSession("roaster-1")
+    now = time.monotonic()
+    batches = iter([[Reading(now + i * 0.1, 25.0 + 0.03 * i, 25.0)] for i in range(iterations)])
+    if executor is None:
+        return per_call(lambda: session.ingest(next(batches)), iterations)
+    return per_call(lambda: wait([executor.submit(session.ingest, next(batches))]), iterations)
+
+
+def main(iterations=50000):
+    full = hook_cost(iterations)
+    sampled = hook_cost(iterations, INGEST_SAMPLE)
+    ingest = ingest_cost(iterations)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        dispatched = ingest_cost(iterations, executor)
+    counts, total, count = INGEST_SECONDS.snapshot()
+    print(f"timing hook, every call       {full * 1e9:8.0f} ns")
+    print(f"timing hook, 1 in {INGEST_SAMPLE:<2}         {sampled * 1e9:8.0f} ns per call")
+    print(f"ingest, 1 reading             {ingest * 1e6:8.1f} µs "
+          f"(histogram mean {1e6 * total / count:.1f} µs over ~{count} batches)")
+    print(f"ingest via worker pool        {dispatched * 1e6:8.1f} µs")
+    print(f"overhead                      {100 * sampled / (ingest - sampled):8.2f} % of ingest, "
+          f"{100 * sampled / (dispatched - sampled):.2f} % of a dispatched batch")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,46 @@
+"""Compare the batch profile generator against the scalar one in a loop
+
+Run from the repository root:
+    python -m benchmarks.profile_generator
+"""
+import time
+
+from utils.profile_generator import (
+    ROAST_LEVELS, catalog_grid, generate_roast_profile, generate_roast_profiles
+)
+
+BEAN_TYPES = ["Arabica", "Robusta", "Liberica", "Excelsa", "Blend"]
+CHARGE_TEMPS = range(150, 255, 5)
+DEVELOPMENT_TIMES = range(10, 41)
+
+
+def best_of(func, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    params = catalog_grid(BEAN_TYPES, list(ROAST_LEVELS), CHARGE_TEMPS, DEVELOPMENT_TIMES)
+    n = len(params[0])
+
+    def loop():
+        for args in zip(*params):
+            generate_roast_profile(*args)
+
+    def batch():
+        generate_roast_profiles(*params, seed=0)
+
+    loop_time = best_of(loop, repeat=1)
+    batch_time = best_of(batch)
+    print(f"profiles:  {n}")
+    print(f"scalar:    {loop_time * 1000:9.1f} ms")
+    print(f"batch:     {batch_time * 1000:9.1f} ms")
+    print(f"speedup:   {loop_time / batch_time:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Time the heat-transfer roast model, one scenario at a time and vectorized
+
+Run from the repository root:
+    python -m benchmarks.roast_model [scenarios]
+"""
+import sys
+import time
+
+import numpy as np
+
+from utils.roast_model import best_schedule, simulate_roasts
+
+
+def main(scenarios=1000):
+    rng = np.random.default_rng(0)
+    batch_sizes = rng.uniform(0.1, 1.0, size=scenarios)
+    charge_temps = rng.uniform(170, 230, size=scenarios)
+    gas = rng.uniform(1.5, 3.5, size=scenarios)
+    fan = rng.uniform(0, 1, size=scenarios)
+
+    loop = min(scenarios, 50)
+    start = time.perf_counter()
+    for i in range(loop):
+        simulate_roasts("Arabica", "Colombia", batch_sizes[i], charge_temps[i], gas=gas[i], fan=fan[i])
+    per_scenario = (time.perf_counter() - start) / loop
+    print(f"one at a time:  {per_scenario * 1000:7.2f} ms/scenario ({loop} runs)")
+
+    start = time.perf_counter()
+    simulate_roasts("Arabica", "Colombia", batch_sizes, charge_temps, gas=gas, fan=fan)
+    vectorized = time.perf_counter() - start
+    print(f"vectorized:     {vectorized * 1000 / scenarios:7.2f} ms/scenario ({scenarios} in {vectorized:.2f} s, "
+          f"{per_scenario * scenarios / vectorized:.0f}x)")
+
+    reference = simulate_roasts("Arabica", "Colombia", 0.25, 190, gas=2.7, fan=0.3, duration=12)
+    start = time.perf_counter()
+    best_schedule(reference["time"], reference["bean"][0], np.linspace(1, 4, 31), np.linspace(0, 1, 21))
+    print(f"schedule search: 31 x 21 settings in {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
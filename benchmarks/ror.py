@@ -0,0 +1,82 @@
+"""Check the streaming RoR against the true rate of rise of a noisy simulated probe
+
+The roast is the heat-transfer model's, so the true curve is smooth. It
+is read live from a SimulatedDataSource, sped up by `time_scale`, through
+a TelemetryBuffer and RateOfRise as the session manager does. The truth is the derivative of the same probe without its
+noise, replayed from the source's own lag model. Exits non-zero if the
+error spread after the first minute exceeds MAX_ERROR_STD at any rate.
+
+Run from the repository root:
+    python -m benchmarks.ror [time_scale] [rates_hz...]
+"""
+import sys
+import time
+
+import numpy as np
+
+from utils.data_source import SimulatedDataSource
+from utils.roast_model import simulate_roast_profile
+from utils.ror import RateOfRise
+from utils.telemetry import TelemetryBuffer
+
+SETTLE = 1.0  # minutes after charge left out, while the probe catches up with the beans
+MAX_ERROR_STD = 2.0  # °C/min
+
+
+def noiseless(source, profile, ticks, interval):
+    """Probe temperature at each tick, without noise, as the source computes it"""
+    lag = 1.0 - np.exp(-interval * source.time_scale / source.lag_seconds)
+    minutes = np.arange(ticks[-1] + 1) * interval * source.time_scale / 60
+    target = np.interp(minutes, profile['Time'], profile['Temperature'])
+    bean = np.empty_like(target)
+    value = target[0]
+    for i, t in enumerate(target):
+        value += (t - value) * lag
+        bean[i] = value
+    return bean[ticks]
+
+
+def measure(profile, rate_hz, time_scale):
+    source = SimulatedDataSource("ror-check", profile, rate_hz=rate_hz * time_scale, time_scale=time_scale, seed=0)
+    interval = 1.0 / source.rate_hz
+    telemetry = TelemetryBuffer()
+    ror = RateOfRise()
+    readings = []
+    with source:
+        deadline = time.monotonic() + profile['Time'].iloc[-1] * 60 / time_scale
+        while time.monotonic() < deadline:
+            batch = source.read_batch()
+            readings.extend(batch)
+            if not batch:
+                time.sleep(0.005)
+
+    started = readings[0].timestamp
+    ticks = np.array([round((reading.timestamp - started) / interval) for reading in readings])
+    minutes = ticks / (rate_hz * 60)
+    for t, reading in zip(minutes, readings):
+        telemetry.append(t, reading.bean_temp)
+        ror.sync(telemetry)
+
+    truth = np.gradient(noiseless(source, profile, ticks, interval), minutes)
+    settled = minutes >= SETTLE
+    error = (ror.smoothed - truth)[settled]
+    negative = (ror.smoothed < 0)[settled]
+    return len(readings), error, negative.mean()
+
+
+def main(time_scale=60.0, *rates):
+    rates = rates or (1.0, 2.0, 10.0)
+    profile, _, _ = simulate_roast_profile("Arabica", "Colombia", 0.25, 200, 20)
+    print(f"{'rate':>6} {'samples':>8} {'err std':>8} {'p95 |err|':>10} {'negative':>9}")
+    failed = False
+    for rate_hz in rates:
+        samples, error, negative = measure(profile, rate_hz, time_scale)
+        print(f"{rate_hz:>4.0f}Hz {samples:>8} {error.std():>8.2f} {np.percentile(np.abs(error), 95):>10.2f} "
+              f"{negative:>9.1%}")
+        failed |= error.std() > MAX_ERROR_STD
+    if failed:
+        sys.exit(f"RoR error spread above {MAX_ERROR_STD} °C/min")
+
+
+if __name__ == "__main__":
+    main(*(float(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,48 @@
+"""Measure per-roaster update latency as the number of roasters grows
+
+Latency is the time from a batch of readings being received to the
+owning RoastSession having ingested it. Run from the repository root:
+    python -m benchmarks.session_manager [seconds]
+"""
+import sys
+import time
+
+import numpy as np
+
+from utils.data_source import SimulatedDataSource
+from utils.session_manager import SessionManager
+
+ROASTER_COUNTS = (1, 2, 4, 8, 16, 32)
+
+
+def run(roasters, seconds, rate_hz=10.0):
+    latencies = []
+
+    def record(session):
+        if session.last_reading_at is not None:
+            latencies.append(time.monotonic() - session.last_reading_at)
+
+    manager = SessionManager(workers=4).start()
+    try:
+        for i in range(roasters):
+            machine_id = f"roaster-{i + 1}"
+            session = manager.start_roast(
+                machine_id, SimulatedDataSource(machine_id, rate_hz=rate_hz, time_scale=60, seed=i)
+            )
+            session.subscribe(record)
+        time.sleep(seconds)
+    finally:
+        manager.stop()
+    return np.array(latencies) * 1000
+
+
+def main(seconds=3.0):
+    print(f"{'roasters':>8} {'updates':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for roasters in ROASTER_COUNTS:
+        latencies = run(roasters, seconds)
+        print(f"{roasters:>8} {len(latencies):>8} "
+              f"{np.percentile(latencies, 50):>8.3f} {np.percentile(latencies, 99):>8.3f}")
+
+
+if __name__ == "__main__":
+    main(*(float(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,53 @@
+"""Time k-NN queries against a large library of roast curves
+
+Run from the repository root:
+    python -m benchmarks.similarity [library_size]
+"""
+import sys
+import time
+
+import numpy as np
+
+from utils.profile_generator import ROAST_LEVELS, generate_roast_profiles
+from utils.similarity import RoastIndex, resample
+
+
+def main(library_size=100_000, queries=50):
+    rng = np.random.default_rng(0)
+    levels = rng.choice(list(ROAST_LEVELS), size=library_size)
+    charge_temps = rng.uniform(150, 250, size=library_size)
+    times, temperatures = generate_roast_profiles("Arabica", levels, charge_temps, 20, seed=1)
+
+    start = time.perf_counter()
+    index = RoastIndex(n_components=16)
+    index.add_many(
+        np.arange(library_size),
+        [resample(t, T, index.grid) for t, T in zip(times, temperatures)],
+    )
+    index.query(times[0], temperatures[0], partial=False)  # fits the PCA
+    print(f"library:        {library_size} curves, built in {time.perf_counter() - start:.2f} s")
+
+    for label, fraction, partial in (("prefix 25%", 0.25, True), ("prefix 50%", 0.5, True),
+                                     ("prefix 100%", 1.0, True), ("finished (PCA)", 1.0, False)):
+        timings = []
+        for i in rng.integers(0, library_size, size=queries):
+            n = max(2, int(len(times[i]) * fraction))
+            t0 = time.perf_counter()
+            index.query(times[i][:n], temperatures[i][:n] + rng.normal(0, 0.5, size=n), partial=partial)
+            timings.append(time.perf_counter() - t0)
+        timings = np.array(timings) * 1000
+        print(f"{label:<15} p50 {np.percentile(timings, 50):6.1f} ms   p99 {np.percentile(timings, 99):6.1f} ms")
+
+    # A roast is archived while others are still matching against the library
+    timings = []
+    for i in rng.integers(0, library_size, size=queries):
+        t0 = time.perf_counter()
+        index.add(f"new-{len(index)}", times[i], temperatures[i])
+        index.query(times[i][:len(times[i]) // 2], temperatures[i][:len(times[i]) // 2])
+        timings.append(time.perf_counter() - t0)
+    timings = np.array(timings) * 1000
+    print(f"{'add + query':<15} p50 {np.percentile(timings, 50):6.1f} ms   p99 {np.percentile(timings, 99):6.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,90 @@
+"""Time dashboard cold start and reruns with Streamlit's AppTest
+
+Cold start runs the script once in a fresh interpreter, imports
+included. Reruns are timed in one process, idle and with a generated
+profile on screen, counting only the script's own execution (AppTest's
+message handling around it is excluded). Event log and archive go to a
+temporary directory.
+
+Run from the repository root:
+    python -m benchmarks.startup [reruns]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+COLD_START = f"""
+import time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({APP!r}, default_timeout=60)
+at.run()
+assert not at.exception, at.exception
+print(time.perf_counter() - start)
+"""
+
+
+def cold_start(env, runs=5):
+    timings = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", COLD_START], env=env, check=True,
+                             capture_output=True, text=True)
+        timings.append(float(out.stdout.split()[-1]))
+    return np.array(timings)
+
+
+def timed_exec(timings):
+    # The script runner calls exec() by its module-global name; shadow it to time each run
+    def run(code, namespace):
+        start = time.perf_counter()
+        try:
+            exec(code, namespace)
+        finally:
+            timings.append(time.perf_counter() - start)
+    return run
+
+
+def reruns(at, timings, count):
+    del timings[:]
+    for _ in range(count):
+        at.run()
+    assert not at.exception, at.exception
+    return np.array(timings)
+
+
+def report(label, timings):
+    timings = timings * 1000
+    print(f"{label:<22} p50 {np.percentile(timings, 50):7.1f} ms   p99 {np.percentile(timings, 99):7.1f} ms")
+
+
+def main(count=30):
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["ROAST_EVENT_DB"] = os.path.join(tmp, "events.db")
+        os.environ["ROAST_ARCHIVE"] = os.path.join(tmp, "archive")
+        report("cold start", cold_start(dict(os.environ)))
+
+        from streamlit.runtime.scriptrunner import script_runner
+        from streamlit.testing.v1 import AppTest
+
+        timings = []
+        script_runner.exec = timed_exec(timings)
+        at = AppTest.from_file(APP, default_timeout=60)
+        at.run()
+        # Let the app's background warm-up finish, as it would while a user reads the page
+        time.sleep(2)
+        report("rerun (idle)", reruns(at, timings, count))
+
+        del timings[:]
+        at.button(key="generate_profile").click().run()
+        report("generate profile", np.array(timings))
+        report("rerun (with profile)", reruns(at, timings, count))
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,72 @@
+"""Randomized check of TelemetryBuffer compaction and RateOfRise sync
+
+Appends random readings, with events at random rows (sometimes most of
+them), to bounded buffers of random sizes, syncing a RateOfRise after
+every append as the session manager does. After each append it checks:
+  - every event row is kept, with its time and temperature, and
+    first_event() still finds the first occurrence of each event
+  - times strictly increase and the newest reading is the last row
+  - the buffer holds at most max(max_samples, events + 2) rows: the
+    first and newest samples plus every event row
+  - RateOfRise.smoothed equals rate_of_rise() over the buffer, whenever
+    rows were compacted or the newest one replaced, and at the end
+
+Run from the repository root:
+    python -m benchmarks.telemetry [trials]
+"""
+import sys
+
+import numpy as np
+
+from utils.ror import RateOfRise, rate_of_rise
+from utils.telemetry import TelemetryBuffer
+
+EVENTS = ("Charge", "First Crack", "Second Crack", "Gas Adjustment")
+
+
+def check(trial):
+    rng = np.random.default_rng(trial)
+    max_samples = int(rng.integers(3, 200))
+    appends = int(rng.integers(1, 2000))
+    event_rate = rng.choice([0.0, 0.01, 0.2, 0.9])
+    times = np.cumsum(rng.uniform(0.001, 0.05, appends))
+    temperatures = 25 + 200 * (1 - np.exp(-times / 4)) + rng.normal(0, 0.3, appends)
+
+    telemetry = TelemetryBuffer(capacity=int(rng.integers(1, 64)), max_samples=max_samples)
+    ror = RateOfRise()
+    event_rows = []  # (time, temperature, event name) of every event appended
+    first = {}
+    for i, (t, temperature) in enumerate(zip(times, temperatures)):
+        event = rng.choice(EVENTS) if rng.random() < event_rate else ''
+        generation, rows = telemetry.generation, len(telemetry)
+        telemetry.append(t, temperature, event)
+        ror.sync(telemetry)
+        if event:
+            event_rows.append((t, temperature, event))
+            first.setdefault(event, (t, temperature))
+
+        where = f"trial {trial}, append {i} (max_samples {max_samples})"
+        marked = telemetry.event_codes != 0
+        names = telemetry.event_names
+        kept = list(zip(telemetry.time[marked], telemetry.temperature[marked],
+                        (names[code] for code in telemetry.event_codes[marked])))
+        assert kept == event_rows, f"{where}: event rows changed"
+        for event_, expected in first.items():
+            assert telemetry.first_event(event_) == expected, f"{where}: first {event_} moved"
+        assert np.all(np.diff(telemetry.time) > 0), f"{where}: times not increasing"
+        assert telemetry.time[-1] == t, f"{where}: newest reading missing"
+        assert len(telemetry) <= max(max_samples, len(event_rows) + 2), \
+            f"{where}: {len(telemetry)} rows for {len(event_rows)} events"
+        if telemetry.generation != generation or len(telemetry) == rows or i == appends - 1:
+            assert np.allclose(ror.smoothed, rate_of_rise(telemetry.time, telemetry.temperature), equal_nan=True), \
+                f"{where}: streaming RoR differs from rate_of_rise()"
+    return appends
+
+
+def main(trials=50):
+    appends = sum(check(trial) for trial in range(trials))
+    print(f"{trials} trials, {appends} appends: OK")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,97 @@
+"""Process-wide resources for the dashboard
+
+Streamlit re-executes app.py on every rerun, and each @st.cache_* function
+declared there is re-hashed from its source each time. Declared here, in a
+module imported once per process, they cost nothing per rerun.
+"""
+import importlib
+import os
+import threading
+
+import streamlit as st
+
+from utils.archive import RoastArchive
+from utils.energy import energy_frame
+from utils.event_store import EventStore
+from utils.metrics import metrics
+from utils.session_manager import SessionManager
+from utils.similarity import RoastIndex
+from utils.visualization import RoastFigure
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+
+# Optional metrics exports: an HTTP port serving /metrics and/or a text file rewritten periodically
+METRICS_PORT = os.environ.get("ROAST_METRICS_PORT")
+METRICS_FILE = os.environ.get("ROAST_METRICS_FILE")
+
+
+@st.cache_data
+def load_asset(name):
+    """Read a file from assets/ once per server process"""
+    with open(os.path.join(ASSETS_DIR, name), "rb") as f:
+        return f.read()
+
+
+@st.cache_data
+def figure_layers(first_crack_time, second_crack_time):
+    """Static chart layers, shared by every tab with the same crack predictions"""
+    return RoastFigure.static_layers(first_crack_time, second_crack_time)
+
+
+@st.cache_data(ttl=60)
+def archive_energy(root, saved=0):
+    """Per-roast energy for the whole archive
+
+    Pass the archive's `saved` count so a roast archived by this server
+    shows up at once; other writers are picked up within a minute.
+    """
+    return energy_frame(RoastArchive(root).metadata_frame())
+
+
+@st.cache_resource
+def get_session_manager():
+    """One roast engine per server process, shared by every browser tab"""
+    archive = RoastArchive()
+    return SessionManager(
+        event_store=EventStore(),
+        archive=archive,
+        # Loaded in the background so a large archive doesn't hold up the first page
+        roast_index=RoastIndex.from_archive(archive, background=True, n_components=16)
+    ).start()
+
+
+@st.cache_resource
+def preload_analytics():
+    """Warm up slow imports in the background, once per server process
+
+    Called after the first page is drawn, so cold start doesn't wait for
+    them and the first Generate or Start Roast usually finds them loaded:
+    scipy for the roast model and RoR, and the validators plotly loads on
+    its first figure.
+    """
+    def preload():
+        for module in ("scipy.integrate", "scipy.signal"):
+            importlib.import_module(module)
+        RoastFigure.static_layers()
+    threading.Thread(target=preload, name="preload-analytics", daemon=True).start()
+
+
+@st.cache_resource
+def start_metrics_exporters():
+    """Start the Prometheus endpoint and file sink configured by environment, once per process"""
+    if METRICS_PORT:
+        metrics.serve(int(METRICS_PORT))
+    if METRICS_FILE:
+        metrics.start_file_sink(METRICS_FILE)
+
+
+@st.cache_resource
+def get_explorer_pool():
+    """Worker processes for the outcome explorer, shared by every tab
+
+    Started on first use and kept, so only the first exploration waits
+    for workers to spawn and import the roast model.
+    """
+    # Imported here so cold start doesn't pay for it
+    from utils.monte_carlo import default_pool
+    return default_pool()
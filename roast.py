@@ -0,0 +1,114 @@
+"""Headless roast tools
+
+Re-score a directory of recorded roasts (archived .arrow files and CSV
+reports) with the dashboard's analysis, spread over a process pool:
+
+    python -m roast analyze data/archive -o summary.csv
+    python -m roast analyze recordings/ --workers 8 --redetect -o summary.parquet
+
+Account energy across the archive by roaster and shift, and list the
+profiles using the most energy per kg of green coffee:
+
+    python -m roast energy data/archive --by machine_id shift --top 20
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import pandas as pd
+
+from utils.analysis import SUMMARY_COLUMNS, analyze_file, find_recordings
+from utils.archive import DEFAULT_ROOT, RoastArchive
+from utils.energy import energy_frame, energy_report, least_efficient_profiles
+
+
+def _rows(paths, workers, redetect):
+    analyze = partial(analyze_file, redetect=redetect)
+    if workers == 1:
+        yield from map(analyze, paths)
+        return
+    workers = workers or os.cpu_count()
+    # Large chunks amortize pickling; small enough to keep every worker busy
+    chunksize = max(1, min(256, len(paths) // (workers * 8)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(analyze, paths, chunksize=chunksize)
+
+
+def analyze(args):
+    paths = find_recordings(args.directory)
+    start = time.perf_counter()
+    rows = _rows(paths, args.workers, args.redetect)
+    failed = 0
+
+    if args.output.endswith(".parquet"):
+        summary = pd.DataFrame(list(rows), columns=SUMMARY_COLUMNS)
+        failed = int(summary["error"].notna().sum())
+        summary.to_parquet(args.output, index=False)
+    else:
+        # Written as results arrive, so memory stays flat however many roasts there are
+        out = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+        try:
+            writer = csv.DictWriter(out, fieldnames=SUMMARY_COLUMNS)
+            writer.writeheader()
+            for row in rows:
+                failed += row["error"] is not None
+                writer.writerow(row)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"analyzed {len(paths)} roasts in {elapsed:.1f} s ({failed} failed)", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def energy(args):
+    start = time.perf_counter()
+    frame = energy_frame(RoastArchive(args.archive).metadata_frame())
+    if frame.empty:
+        print(f"no archived roasts under {args.archive}", file=sys.stderr)
+        return 1
+    with pd.option_context("display.width", None, "display.max_columns", None, "display.float_format", "{:.3f}".format):
+        print(energy_report(frame, args.by).to_string(index=False))
+        print()
+        print(f"Least efficient profiles (at least {args.min_roasts} roasts):")
+        print(least_efficient_profiles(frame, args.top, args.min_roasts).to_string(index=False))
+    elapsed = time.perf_counter() - start
+    print(f"accounted {len(frame)} roasts in {elapsed:.1f} s", file=sys.stderr)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m roast", description="Headless roast tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    analyze_parser = commands.add_parser("analyze", help="summarize a directory of recorded roasts")
+    analyze_parser.add_argument("directory", nargs="?", default=DEFAULT_ROOT,
+                                help="recording, or directory searched recursively for .arrow and .csv recordings")
+    analyze_parser.add_argument("-o", "--output", default="-",
+                                help="summary table, .csv or .parquet (default: CSV on stdout)")
+    analyze_parser.add_argument("-w", "--workers", type=int, default=None,
+                                help="worker processes (default: one per core; 1 runs in-process)")
+    analyze_parser.add_argument("--redetect", action="store_true",
+                                help="re-run the crack detector instead of trusting recorded events")
+    analyze_parser.set_defaults(handler=analyze)
+
+    energy_parser = commands.add_parser("energy", help="energy use per roaster and shift, and the least efficient profiles")
+    energy_parser.add_argument("archive", nargs="?", default=DEFAULT_ROOT, help="roast archive directory")
+    energy_parser.add_argument("--by", nargs="+", default=["machine_id", "shift"],
+                               help="columns to group by (default: machine_id shift)")
+    energy_parser.add_argument("--top", type=int, default=10, help="profiles to list (default: 10)")
+    energy_parser.add_argument("--min-roasts", type=int, default=3,
+                               help="ignore profiles roasted fewer times (default: 3)")
+    energy_parser.set_defaults(handler=energy)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
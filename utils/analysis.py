@@ -0,0 +1,156 @@
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from utils.archive import RoastArchive
+from utils.crack_detector import CRACKS, CrackDetector
+from utils.energy import integrate_energy
+from utils.roast_model import DEFAULT_FAN, DEFAULT_GAS
+from utils.ror import rate_of_rise
+
+Flavor = namedtuple("Flavor", ["name", "note", "warning"])
+
+# Flavor predicted from roast duration: (longest duration in minutes, flavor)
+FLAVOR_BANDS = (
+    (8, Flavor("Bright and acidic", "Possibly underdeveloped", False)),
+    (11, Flavor("Balanced and sweet", "Good development", False)),
+    (float("inf"), Flavor("Bitter and smoky", "Possibly overdeveloped", True)),
+)
+
+# Columns of the per-roast summary table, in order
+SUMMARY_COLUMNS = [
+    "path", "roast_id", "machine_id", "start_time", "bean_type", "origin", "roast_level", "batch_size",
+    "duration", "peak_temp", "final_temp", "max_ror", "mean_ror", "first_crack", "second_crack",
+    "development", "energy_kwh", "energy_kwh_per_kg", "gas_m3", "flavor", "error",
+]
+
+RECORDING_EXTENSIONS = (".arrow", ".csv")
+
+
+def predict_flavor(duration):
+    """Flavor expected from a roast of `duration` minutes"""
+    for longest, flavor in FLAVOR_BANDS:
+        if duration <= longest:
+            return flavor
+    return FLAVOR_BANDS[-1][1]
+
+
+def roast_energy(time, metadata):
+    """Energy totals for a recorded roast (see utils.energy.ENERGY_COLUMNS)
+
+    Totals metered during the roast are used when the recording has them;
+    otherwise the samples are integrated at its burner and fan settings.
+    """
+    if metadata.get("energy_kwh") is not None:
+        return {key: metadata.get(key) for key in ("energy_kwh", "energy_kwh_per_kg", "gas_m3")}
+    burner_power, fan_speed, batch_size = (metadata.get(key) for key in ("burner_power", "fan_speed", "batch_size"))
+    return integrate_energy(
+        time,
+        DEFAULT_GAS if burner_power is None else burner_power,
+        DEFAULT_FAN if fan_speed is None else fan_speed,
+        batch_size / 1000 if batch_size else None,
+    )
+
+
+def event_time(time, event_codes, event_names, event):
+    """Time of the first sample marked with `event`, or None"""
+    if event not in event_names:
+        return None
+    marked = np.flatnonzero(np.asarray(event_codes) == event_names.index(event))
+    return float(time[marked[0]]) if len(marked) else None
+
+
+def detect_cracks(time, temperature, bean_type=None):
+    """Replay a recorded curve through the crack detector; returns (first, second)"""
+    detector = CrackDetector.for_bean(bean_type)
+    for t, temperature_ in zip(time, temperature):
+        detector.update(t, temperature_)
+    found = {event: t for event, t, _ in detector.detections}
+    return tuple(found.get(event) for event in CRACKS)
+
+
+def analyze_roast(time, temperature, event_codes=None, event_names=None, metadata=None, redetect=False):
+    """Summary statistics for one recorded roast, as a dict keyed by SUMMARY_COLUMNS
+
+    Crack times come from the recorded events unless `redetect` is set or
+    the recording has none, in which case the curve is replayed through
+    the crack detector.
+    """
+    metadata = metadata or {}
+    time = np.asarray(time, dtype=np.float64)
+    temperature = np.asarray(temperature, dtype=np.float64)
+    row = {column: metadata.get(column) for column in SUMMARY_COLUMNS}
+    if len(time) == 0:
+        row["error"] = "no samples"
+        return row
+
+    # NaN until the RoR span has filled
+    ror = rate_of_rise(time, temperature)
+    ror = ror[~np.isnan(ror)]
+    duration = metadata.get("duration") or float(time[-1] - time[0])
+    cracks = (None, None)
+    if not redetect and event_names is not None:
+        cracks = tuple(event_time(time, event_codes, list(event_names), event) for event in CRACKS)
+    if redetect or cracks == (None, None):
+        cracks = detect_cracks(time, temperature, metadata.get("bean_type"))
+    first_crack, second_crack = cracks
+
+    energy = roast_energy(time, metadata)
+    row.update(
+        duration=duration,
+        peak_temp=float(temperature.max()),
+        final_temp=float(temperature[-1]),
+        max_ror=float(ror.max()) if len(ror) else None,
+        mean_ror=float(ror.mean()) if len(ror) else None,
+        first_crack=first_crack,
+        second_crack=second_crack,
+        development=100 * (duration - first_crack) / duration if first_crack is not None and duration else None,
+        energy_kwh=energy["energy_kwh"],
+        energy_kwh_per_kg=energy["energy_kwh_per_kg"],
+        gas_m3=energy["gas_m3"],
+        flavor=predict_flavor(duration).name,
+    )
+    return row
+
+
+def load_recording(path):
+    """Read a recorded roast: an archived .arrow file or a CSV report
+
+    Returns (metadata, time, temperature, event_codes, event_names).
+    """
+    if path.endswith(".arrow"):
+        table, metadata = RoastArchive.load(path)
+        events = table.column("Event").combine_chunks()
+        return (metadata, table.column("Time").to_numpy(), table.column("Temperature").to_numpy(),
+                events.indices.to_numpy(zero_copy_only=False), events.dictionary.to_pylist())
+
+    frame = pd.read_csv(path)
+    events = pd.Categorical(frame["Event"].fillna("")) if "Event" in frame else None
+    metadata = {"roast_id": os.path.splitext(os.path.basename(path))[0]}
+    return (metadata, frame["Time"].to_numpy(), frame["Temperature"].to_numpy(),
+            events.codes if events is not None else None,
+            list(events.categories) if events is not None else None)
+
+
+def analyze_file(path, redetect=False):
+    """analyze_roast for a recording on disk; failures are reported in the error column"""
+    try:
+        metadata, time, temperature, event_codes, event_names = load_recording(path)
+        row = analyze_roast(time, temperature, event_codes, event_names, metadata, redetect)
+    except Exception as exc:
+        row = dict.fromkeys(SUMMARY_COLUMNS)
+        row["error"] = f"{type(exc).__name__}: {exc}"
+    row["path"] = path
+    return row
+
+
+def find_recordings(root):
+    """Recorded roast files under a directory, sorted (a single file is returned as is)"""
+    if os.path.isfile(root):
+        return [root]
+    paths = []
+    for directory, _, files in os.walk(root):
+        paths.extend(os.path.join(directory, name) for name in files if name.endswith(RECORDING_EXTENSIONS))
+    return sorted(paths)
@@ -0,0 +1,132 @@
+import glob
+import json
+import os
+from datetime import date, datetime
+
+import pandas as pd
+import pyarrow as pa
+
+DEFAULT_ROOT = os.environ.get("ROAST_ARCHIVE", os.path.join("data", "archive"))
+
+METADATA_KEY = b"roast"
+
+
+def _partition_value(value):
+    # Keep partition directory names filesystem-safe
+    return str(value).replace(os.sep, "_").replace("=", "_") if value is not None else "unknown"
+
+
+def _as_date(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.fromisoformat(str(value)).date()
+
+
+def _as_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, datetime.min.time())
+    return datetime.fromisoformat(str(value))
+
+
+class RoastArchive:
+    """Completed roasts stored as Arrow IPC files
+
+    Files are laid out in hive-style partitions,
+    ``date=YYYY-MM-DD/origin=<origin>/bean_type=<bean>/<HHMMSSffffff>-<roast_id>.arrow``,
+    named by start time so listings sort chronologically, with the roast's
+    parameters in the schema metadata. Readers memory-map
+    the files; with compression=None the columns are used in place without
+    any copy, otherwise buffers are decompressed (lz4 by default) on read.
+    """
+
+    def __init__(self, root=DEFAULT_ROOT, compression="lz4"):
+        self.root = root
+        self.compression = compression
+        # Roasts saved through this instance, for callers caching archive reads
+        self.saved = 0
+
+    def save(self, roast_id, telemetry, metadata):
+        """Write a finished roast's telemetry; returns the file path"""
+        metadata = dict(metadata, roast_id=roast_id)
+        started = _as_datetime(metadata.get("start_time") or datetime.now())
+        metadata["start_time"] = started.isoformat()
+        partition = os.path.join(
+            self.root,
+            f"date={_as_date(started).isoformat()}",
+            f"origin={_partition_value(metadata.get('origin'))}",
+            f"bean_type={_partition_value(metadata.get('bean_type'))}",
+        )
+        os.makedirs(partition, exist_ok=True)
+
+        codes = telemetry.event_codes
+        table = pa.table({
+            "Time": telemetry.time,
+            "Temperature": telemetry.temperature,
+            "Event": pa.DictionaryArray.from_arrays(
+                pa.array(codes, type=pa.int16()), pa.array(telemetry.event_names, type=pa.string())
+            ),
+        }).replace_schema_metadata({METADATA_KEY: json.dumps(metadata, default=str)})
+
+        path = os.path.join(partition, f"{started:%H%M%S%f}-{roast_id}.arrow")
+        tmp_path = path + ".tmp"
+        options = pa.ipc.IpcWriteOptions(compression=self.compression)
+        with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema, options=options) as writer:
+            writer.write_table(table)
+        os.replace(tmp_path, path)
+        self.saved += 1
+        return path
+
+    def paths(self, origin=None, bean_type=None, since=None, until=None):
+        """Archived roast files, oldest first, filtered on the partition directories alone"""
+        pattern = os.path.join(
+            self.root,
+            "date=*",
+            f"origin={_partition_value(origin) if origin is not None else '*'}",
+            f"bean_type={_partition_value(bean_type) if bean_type is not None else '*'}",
+            "*.arrow",
+        )
+        since, until = _as_date(since), _as_date(until)
+        paths = []
+        for path in glob.glob(pattern):
+            day = date.fromisoformat(os.path.relpath(path, self.root).split(os.sep)[0][len("date="):])
+            if (since is None or day >= since) and (until is None or day < until):
+                paths.append((day, os.path.basename(path), path))
+        # By day, then by the start time the file is named with, whatever the origin and bean
+        return [path for _, _, path in sorted(paths)]
+
+    @staticmethod
+    def load(path):
+        """Memory-map one archived roast; returns (pyarrow.Table, metadata dict)"""
+        with pa.memory_map(path, "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+        metadata = json.loads(table.schema.metadata[METADATA_KEY])
+        return table, metadata
+
+    def load_curves(self, limit=None, **filters):
+        """Return [(metadata, time, temperature)] for matching roasts, newest first"""
+        paths = self.paths(**filters)
+        if limit:
+            paths = paths[-limit:]
+        return [self.load_curve(path) for path in reversed(paths)]
+
+    @classmethod
+    def load_curve(cls, path):
+        """Return (metadata, time, temperature) for one archived roast"""
+        table, metadata = cls.load(path)
+        return metadata, table.column("Time").to_numpy(), table.column("Temperature").to_numpy()
+
+    def metadata_frame(self, **filters):
+        """One row of roast parameters per archived roast"""
+        rows = []
+        for path in self.paths(**filters):
+            with pa.memory_map(path, "r") as source:
+                schema = pa.ipc.open_file(source).schema
+            rows.append(dict(json.loads(schema.metadata[METADATA_KEY]), path=path))
+        return pd.DataFrame(rows)
+
@@ -0,0 +1,245 @@
+import math
+import wave
+
+import numpy as np
+
+from utils.roast_model import BEAN_PROPERTIES
+
+CRACKS = ("First Crack", "Second Crack")
+
+
+def _decay(dt, tau):
+    # EMA weight for a sample dt after the previous one, time constant tau (same units)
+    return 1.0 - math.exp(-dt / tau) if dt > 0 else 0.0
+
+
+class CrackDetector:
+    """Streaming first/second crack detector
+
+    Each sample costs O(1) time and state. Evidence for the next crack is
+    scored in [0, 1] from up to four sources and averaged with `weights`
+    over the sources available:
+      - thermal: bean temperature against the crack temperature
+        (0.5 at the crack temperature, rising over `band` °C)
+      - ror: the flick in the rate of rise as the crack's exotherm sets
+        in, i.e. the fast RoR EMA rising above the slow one, as a
+        z-score against the divergence's own running spread. Only a
+        rise counts, and only after the turning point: the steady
+        decline of a roast's RoR and the swings right after charge
+        are not cracks
+      - acoustic: crack pops per minute, when pop counts are supplied
+      - timing: closeness to an expected crack time (e.g. the roast
+        model's prediction), when given
+
+    A crack is reported once the thermal score has reached `gate` and the
+    combined confidence reaches `threshold`, or unconditionally once the
+    beans are `band` °C past the crack temperature. Onset means crossing:
+    nothing is reported in the first `warmup` minutes or before the beans
+    have been below the crack temperature. The probe reads behind the beans, so temperatures are
+    compensated by RoR x `probe_lag` (min) plus the smoothing delay.
+    """
+
+    def __init__(self, first_crack_temp=196.0, second_crack_temp=224.0, expected_times=(None, None),
+                 band=6.0, threshold=0.55, gate=0.2, weights=None, smoothing=0.2, fast=0.4, slow=1.5,
+                 pop_scale=15.0, timing_sigma=1.0, warmup=1.0, probe_lag=20 / 60):
+        self.crack_temps = (first_crack_temp, second_crack_temp)
+        self.expected_times = tuple(expected_times)
+        self.band = band
+        self.threshold = threshold
+        self.gate = gate
+        self.weights = dict({"thermal": 0.4, "ror": 0.25, "acoustic": 0.25, "timing": 0.1}, **(weights or {}))
+        self.smoothing = smoothing  # minutes
+        self.fast = fast
+        self.slow = slow
+        self.pop_scale = pop_scale  # pops/min for a score of ~0.63
+        self.timing_sigma = timing_sigma
+        self.warmup = warmup
+        self.probe_lag = probe_lag
+        self.reset()
+
+    @classmethod
+    def for_bean(cls, bean_type, **kwargs):
+        """Detector using the crack temperatures of a bean type"""
+        properties = BEAN_PROPERTIES.get(bean_type, BEAN_PROPERTIES["Arabica"])
+        return cls(properties["first_crack"], properties["second_crack"], **kwargs)
+
+    def reset(self):
+        self.stage = 0
+        self.detections = []
+        self._time = None
+        self._start = None
+        self._temperature = None
+        self._ror_fast = self._ror_slow = 0.0
+        self._divergence_var = 0.0
+        self._turned = False
+        self._pop_rate = 0.0
+        self._acoustic = False
+        self._armed = False
+        self.confidence = 0.0
+
+    @property
+    def done(self):
+        return self.stage >= len(CRACKS)
+
+    def confirm(self, event):
+        """Accept a crack reported elsewhere (e.g. by the operator) and move past it"""
+        if event in CRACKS:
+            if CRACKS.index(event) >= self.stage:
+                self.stage = CRACKS.index(event) + 1
+                self._armed = False
+
+    def update(self, time, temperature, pops=None):
+        """Add one sample (minutes, °C, optional pop count since the last one)
+
+        Returns (event_type, confidence) when a crack is detected, else None.
+        """
+        if self._time is None:
+            self._time = self._start = time
+            self._temperature = temperature
+            return None
+        dt = time - self._time
+        if dt <= 0:
+            return None
+        self._time = time
+
+        # Smoothed temperature, then fast and slow EMAs of its derivative
+        previous = self._temperature
+        self._temperature += _decay(dt, self.smoothing) * (temperature - self._temperature)
+        ror = (self._temperature - previous) / dt
+        self._ror_fast += _decay(dt, self.fast) * (ror - self._ror_fast)
+        self._ror_slow += _decay(dt, self.slow) * (ror - self._ror_slow)
+        divergence = self._ror_fast - self._ror_slow
+        warm = time - self._start >= self.warmup
+        # Turning point: the beans have stopped cooling the probe and are heating up
+        self._turned = self._turned or (warm and self._ror_fast > 0)
+        ror_score = 0.0
+        if self._turned and divergence > 0 and self._divergence_var > 0:
+            ror_score = min(1.0, divergence / (3.0 * math.sqrt(self._divergence_var)))
+        self._divergence_var += _decay(dt, self.slow * 4) * (divergence ** 2 - self._divergence_var)
+
+        if pops is not None:
+            self._acoustic = True
+            self._pop_rate += _decay(dt, self.fast) * (pops / dt - self._pop_rate)
+
+        if self.done:
+            return None
+        crack_temp = self.crack_temps[self.stage]
+        bean = self._temperature + self._ror_fast * (self.probe_lag + self.smoothing + self.fast)
+        self._armed = self._armed or bean < crack_temp
+        thermal = 1.0 / (1.0 + math.exp(-4.0 * (bean - crack_temp) / self.band))
+        scores = {"thermal": thermal}
+        if self.stage == 0:
+            # Second crack has no flick of its own; it would only pick up first crack's
+            scores["ror"] = ror_score
+        if self._acoustic:
+            scores["acoustic"] = 1.0 - math.exp(-self._pop_rate / self.pop_scale)
+        expected = self.expected_times[self.stage] if self.stage < len(self.expected_times) else None
+        if expected is not None:
+            scores["timing"] = math.exp(-0.5 * ((time - expected) / self.timing_sigma) ** 2)
+        total = sum(self.weights[name] for name in scores)
+        self.confidence = sum(self.weights[name] * score for name, score in scores.items()) / total
+
+        # Compensation can overshoot on the steep climb after charge
+        if not (warm and self._armed and self._temperature >= crack_temp - self.band):
+            return None
+        if (thermal >= self.gate and self.confidence >= self.threshold) or \
+                bean >= crack_temp + self.band:
+            event = CRACKS[self.stage]
+            self.stage += 1
+            self._armed = False
+            self.detections.append((event, time, self.confidence))
+            return event, self.confidence
+        return None
+
+
+class PopCounter:
+    """Count crack pops in a mono audio stream with O(1) state
+
+    Audio is cut into `frame_ms` frames; a pop is a frame whose RMS jumps
+    above `threshold` times the running noise floor after a quiet frame.
+    """
+
+    def __init__(self, sample_rate, frame_ms=10.0, threshold=6.0, floor_frames=200):
+        self.sample_rate = sample_rate
+        self.frame = max(1, int(sample_rate * frame_ms / 1000))
+        self.threshold = threshold
+        self.alpha = 1.0 / floor_frames
+        self._floor = None
+        self._loud = False
+        self._remainder = np.empty(0, dtype=np.float64)
+
+    def feed(self, samples):
+        """Add audio samples; returns the number of pops that started in them"""
+        samples = np.concatenate([self._remainder, np.asarray(samples, dtype=np.float64)])
+        usable = len(samples) - len(samples) % self.frame
+        self._remainder = samples[usable:]
+        if usable == 0:
+            return 0
+        rms = np.sqrt((samples[:usable].reshape(-1, self.frame) ** 2).mean(axis=1))
+        pops = 0
+        for level in rms:
+            if self._floor is None:
+                self._floor = level
+            loud = level > self.threshold * self._floor
+            if loud and not self._loud:
+                pops += 1
+            elif not loud:
+                self._floor += self.alpha * (level - self._floor)
+            self._loud = loud
+        return pops
+
+
+class AcousticFileSource:
+    """File-based stand-in for a roaster microphone
+
+    Reads a mono 16-bit WAV incrementally as the roast clock advances;
+    `pops_until(minutes)` counts the pops in the audio since the last call.
+    """
+
+    def __init__(self, path, **counter_kwargs):
+        self._wave = wave.open(str(path), "rb")
+        if self._wave.getnchannels() != 1 or self._wave.getsampwidth() != 2:
+            raise ValueError("expected a mono 16-bit WAV file")
+        self.sample_rate = self._wave.getframerate()
+        self.counter = PopCounter(self.sample_rate, **counter_kwargs)
+        self._position = 0
+
+    def pops_until(self, minutes):
+        target = min(int(minutes * 60 * self.sample_rate), self._wave.getnframes())
+        if target <= self._position:
+            return 0
+        frames = self._wave.readframes(target - self._position)
+        self._position = target
+        return self.counter.feed(np.frombuffer(frames, dtype="<i2"))
+
+    def close(self):
+        self._wave.close()
+
+
+def write_pops_wav(path, pop_times, duration, sample_rate=8000, noise=200.0, amplitude=12000.0, seed=None):
+    """Write a synthetic roaster recording: background noise plus short pops at pop_times (minutes)"""
+    rng = np.random.default_rng(seed)
+    audio = rng.normal(0, noise, size=int(duration * 60 * sample_rate))
+    click = amplitude * np.exp(-np.arange(int(0.004 * sample_rate)) / (0.001 * sample_rate))
+    for t in pop_times:
+        start = int(t * 60 * sample_rate)
+        end = min(start + len(click), len(audio))
+        if start < len(audio):
+            audio[start:end] += click[:end - start] * rng.choice([-1, 1])
+    with wave.open(str(path), "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(sample_rate)
+        out.writeframes(np.clip(audio, -32768, 32767).astype("<i2").tobytes())
+
+
+def crack_pop_times(first_crack, second_crack=None, first_rate=25.0, second_rate=40.0,
+                    first_length=1.5, second_length=1.0, seed=None):
+    """Poisson pop times (minutes) for cracks starting at the given times"""
+    rng = np.random.default_rng(seed)
+    times = []
+    for start, rate, length in ((first_crack, first_rate, first_length),
+                                (second_crack, second_rate, second_length)):
+        if start is not None:
+            times.append(start + np.sort(rng.uniform(0, length, size=rng.poisson(rate * length))))
+    return np.concatenate(times) if times else np.empty(0)
@@ -0,0 +1,303 @@
+import selectors
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import namedtuple
+
+import numpy as np
+
+from utils.profile_generator import generate_roast_profile
+
+# One probe sample: sample time (monotonic seconds), bean and environment temperature (°C)
+Reading = namedtuple("Reading", ["timestamp", "bean_temp", "env_temp"])
+
+
+class DataSource(ABC):
+    """A roaster's temperature probes
+
+    read_batch() must never block: it returns whatever readings have
+    arrived since the previous call, possibly none.
+    """
+
+    def __init__(self, device_id):
+        self.device_id = device_id
+        self.latest = None
+        self.samples = 0
+        self.connected_at = None
+
+    @abstractmethod
+    def connect(self):
+        """Open the connection to the device"""
+
+    @abstractmethod
+    def close(self):
+        """Release the connection"""
+
+    @abstractmethod
+    def read_batch(self, max_samples=None):
+        """Return the readings received since the last call"""
+
+    def fileno(self):
+        """File descriptor to wait on, if the source has one"""
+        return None
+
+    def poll(self):
+        """Read pending samples and return the most recent bean temperature"""
+        self.read_batch()
+        if self.latest is None:
+            raise LookupError(f"no reading from {self.device_id} yet")
+        return self.latest.bean_temp
+
+    def throughput(self):
+        """Samples received per second since connecting"""
+        if not self.connected_at:
+            return 0.0
+        elapsed = time.monotonic() - self.connected_at
+        return self.samples / elapsed if elapsed > 0 else 0.0
+
+    def _record(self, readings):
+        if readings:
+            self.latest = readings[-1]
+            self.samples += len(readings)
+        return readings
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class StreamDataSource(DataSource):
+    """Source speaking a line protocol (``BT,ET\\n``) over a non-blocking stream
+
+    Frames may carry the device's own sample time in seconds as a third
+    field (``BT,ET,T\\n``); it is mapped onto the local clock, anchored
+    at the newest frame of the first batch. Frames without one are spread
+    evenly between the previous reading and now, so readings that queue
+    up between polls still get distinct, increasing times.
+    """
+
+    def __init__(self, device_id):
+        super().__init__(device_id)
+        self._buffer = b""
+        self._clock_offset = None
+
+    @abstractmethod
+    def _recv(self):
+        """Return the bytes available right now, b'' if none"""
+
+    def read_batch(self, max_samples=None):
+        self._buffer += self._recv()
+        lines = self._buffer.split(b"\n")
+        self._buffer = lines.pop()
+        if max_samples is not None and len(lines) > max_samples:
+            self._buffer = b"\n".join(lines[max_samples:] + [self._buffer])
+            lines = lines[:max_samples]
+
+        now = time.monotonic()
+        frames = []
+        for line in lines:
+            try:
+                fields = [float(field) for field in line.split(b",")]
+            except ValueError:
+                continue  # drop garbled frames
+            if len(fields) in (2, 3):
+                frames.append(fields)
+        if not frames:
+            return self._record([])
+
+        if self._clock_offset is None:
+            stamped = [fields[2] for fields in frames if len(fields) == 3]
+            if stamped:
+                self._clock_offset = now - stamped[-1]
+        previous = self.latest.timestamp if self.latest is not None else (self.connected_at or now)
+        step = (now - previous) / len(frames)
+        readings = []
+        for i, fields in enumerate(frames):
+            if len(fields) == 3:
+                timestamp = fields[2] + self._clock_offset
+            else:
+                timestamp = previous + step * (i + 1)
+            readings.append(Reading(timestamp, fields[0], fields[1]))
+        return self._record(readings)
+
+
+class SerialDataSource(StreamDataSource):
+    """Probe connected over a serial port (requires pyserial)"""
+
+    def __init__(self, device_id, port, baudrate=115200):
+        super().__init__(device_id)
+        self.port = port
+        self.baudrate = baudrate
+        self._serial = None
+
+    def connect(self):
+        try:
+            import serial
+        except ImportError as exc:
+            raise ImportError("SerialDataSource requires pyserial: pip install pyserial") from exc
+        self._serial = serial.Serial(self.port, self.baudrate, timeout=0)
+        self.connected_at = time.monotonic()
+
+    def close(self):
+        if self._serial is not None:
+            self._serial.close()
+            self._serial = None
+
+    def fileno(self):
+        return self._serial.fileno() if self._serial is not None else None
+
+    def _recv(self):
+        return self._serial.read(self._serial.in_waiting or 1)
+
+
+class SimulatedDataSource(StreamDataSource):
+    """Local stand-in for a roaster, streaming over a socket pair
+
+    A background thread plays a generated roast profile through a
+    first-order thermal lag plus probe noise and writes it to one end of
+    the socket, so reads go through the same framing path as real serial
+    hardware. Frames carry their tick time, so readings keep the fixed
+    rate however they are batched. `time_scale` speeds up the simulated
+    roast clock.
+    """
+
+    def __init__(self, device_id, profile=None, rate_hz=2.0, lag_seconds=20.0,
+                 noise=0.3, env_offset=25.0, time_scale=1.0, seed=None):
+        super().__init__(device_id)
+        if profile is None:
+            profile = generate_roast_profile("Arabica", "Medium", 190, 20, seed=seed)
+        self._profile_time = profile['Time'].to_numpy()
+        self._profile_temp = profile['Temperature'].to_numpy()
+        self.rate_hz = rate_hz
+        self.lag_seconds = lag_seconds
+        self.noise = noise
+        self.env_offset = env_offset
+        self.time_scale = time_scale
+        self._rng = np.random.default_rng(seed)
+        self._reader = self._writer = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def connect(self):
+        self._reader, self._writer = socket.socketpair()
+        self._reader.setblocking(False)
+        self._stop.clear()
+        self.connected_at = time.monotonic()
+        self._thread = threading.Thread(target=self._produce, name=f"sim-{self.device_id}", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(1.0)
+        for sock in (self._reader, self._writer):
+            if sock is not None:
+                sock.close()
+        self._reader = self._writer = None
+
+    def fileno(self):
+        return self._reader.fileno() if self._reader is not None else None
+
+    def _recv(self):
+        chunks = []
+        while True:
+            try:
+                chunk = self._reader.recv(65536)
+            except BlockingIOError:
+                break
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def _produce(self):
+        interval = 1.0 / self.rate_hz
+        # Fraction of the gap to the target closed per sample (simulated time)
+        lag = 1.0 - np.exp(-interval * self.time_scale / self.lag_seconds)
+        bean_temp = self._profile_temp[0]
+        started = time.monotonic()
+        tick = 0
+        while not self._stop.is_set():
+            minutes = tick * interval * self.time_scale / 60
+            target = np.interp(minutes, self._profile_time, self._profile_temp)
+            bean_temp += (target - bean_temp) * lag
+            bt, et = bean_temp + self._rng.normal(0, self.noise, size=2)
+            try:
+                self._writer.sendall(b"%.2f,%.2f,%.4f\n" % (bt, et + self.env_offset, tick * interval))
+            except OSError:
+                return
+            tick += 1
+            delay = started + tick * interval - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+
+
+class DataSourcePool:
+    """Shared connections to several roasters, keyed by device ID
+
+    Sources are connected once and reused by every caller. read_all()
+    waits on all of them together and returns each device's new readings.
+    """
+
+    def __init__(self):
+        self._sources = {}
+        self._lock = threading.Lock()
+        self._selector = selectors.DefaultSelector()
+
+    def add(self, source):
+        """Register and connect a source, returning the pooled instance"""
+        with self._lock:
+            existing = self._sources.get(source.device_id)
+            if existing is not None:
+                return existing
+            source.connect()
+            self._sources[source.device_id] = source
+            if source.fileno() is not None:
+                self._selector.register(source.fileno(), selectors.EVENT_READ, source)
+            return source
+
+    def get(self, device_id):
+        return self._sources[device_id]
+
+    def remove(self, device_id):
+        with self._lock:
+            source = self._sources.pop(device_id, None)
+            if source is None:
+                return
+            if source.fileno() is not None:
+                self._selector.unregister(source.fileno())
+            source.close()
+
+    def read_all(self, timeout=0.0, max_samples=None):
+        """Return {device_id: [Reading, ...]} for every source with new data"""
+        with self._lock:
+            ready = [key.data for key, _ in self._selector.select(timeout)]
+            ready += [s for s in self._sources.values() if s.fileno() is None]
+            batches = {}
+            for source in ready:
+                readings = source.read_batch(max_samples)
+                if readings:
+                    batches[source.device_id] = readings
+            return batches
+
+    def throughput(self):
+        """Samples per second received from each device"""
+        return {device_id: source.throughput() for device_id, source in self._sources.items()}
+
+    def close(self):
+        for device_id in list(self._sources):
+            self.remove(device_id)
+        self._selector.close()
+
+    def __len__(self):
+        return len(self._sources)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+
+from utils.roast_model import DEFAULT_FAN, DEFAULT_GAS
+
+# Fan motor power at full speed (kW); fan power goes with the cube of speed
+FAN_RATED_KW = 0.25
+
+# Energy content of natural gas (kWh per m³)
+GAS_KWH_PER_M3 = 10.55
+
+# Shift by hour of day the roast started: (name, first hour, end hour)
+SHIFTS = (("Night", 22, 6), ("Morning", 6, 14), ("Afternoon", 14, 22))
+
+# Roast parameters that make up a profile, for finding inefficient ones
+PROFILE_COLUMNS = ["bean_type", "roast_level", "charge_temp", "development_time", "burner_power", "fan_speed"]
+
+ENERGY_COLUMNS = ["gas_kwh", "fan_kwh", "energy_kwh", "energy_kwh_per_kg", "gas_m3"]
+
+
+def fan_power(fan_speed):
+    """Electrical fan power (kW) at a speed from 0 to 1; works on arrays"""
+    return FAN_RATED_KW * np.asarray(fan_speed, dtype=np.float64) ** 3
+
+
+def _totals(gas_kwh, fan_kwh, batch_kg):
+    # As float64 so a zero or missing (NaN) batch gives NaN per kg rather than raising
+    gas_kwh, fan_kwh = np.float64(gas_kwh), np.float64(fan_kwh)
+    batch_kg = np.asarray(np.nan if batch_kg is None else batch_kg, dtype=np.float64)
+    energy = gas_kwh + fan_kwh
+    with np.errstate(divide="ignore", invalid="ignore"):
+        per_kg = np.where(batch_kg > 0, energy / batch_kg, np.nan)
+    return gas_kwh, fan_kwh, energy, per_kg, gas_kwh / GAS_KWH_PER_M3
+
+
+class EnergyMeter:
+    """Running gas and fan energy for one roast
+
+    Each sample gives the burner power (kW) and fan speed at a roast time
+    (minutes); energy accumulates by the trapezoidal rule in O(1) per
+    sample. A control change is a step: update() at the change time with
+    the old and then the new setting.
+    """
+
+    def __init__(self, batch_kg=None):
+        self.batch_kg = batch_kg
+        self.gas_kwh = 0.0
+        self.fan_kwh = 0.0
+        self._time = None
+        self._burner_kw = 0.0
+        self._fan_kw = 0.0
+
+    def update(self, time, burner_kw, fan_speed):
+        fan_kw = FAN_RATED_KW * fan_speed ** 3
+        if self._time is not None and time > self._time:
+            hours = (time - self._time) / 60
+            self.gas_kwh += 0.5 * (self._burner_kw + burner_kw) * hours
+            self.fan_kwh += 0.5 * (self._fan_kw + fan_kw) * hours
+        if self._time is None or time >= self._time:
+            self._time = time
+            self._burner_kw = burner_kw
+            self._fan_kw = fan_kw
+
+    @property
+    def energy_kwh(self):
+        return self.gas_kwh + self.fan_kwh
+
+    @property
+    def energy_kwh_per_kg(self):
+        return self.energy_kwh / self.batch_kg if self.batch_kg else None
+
+    def totals(self):
+        """Energy totals keyed by ENERGY_COLUMNS"""
+        return dict(
+            gas_kwh=self.gas_kwh,
+            fan_kwh=self.fan_kwh,
+            energy_kwh=self.energy_kwh,
+            energy_kwh_per_kg=self.energy_kwh_per_kg,
+            gas_m3=self.gas_kwh / GAS_KWH_PER_M3,
+        )
+
+
+def integrate_energy(time, burner_kw, fan_speed, batch_kg=None):
+    """Energy totals for whole sampled series at once (trapezoidal), keyed by ENERGY_COLUMNS
+
+    burner_kw and fan_speed are arrays matching time (minutes) or constants.
+    energy_kwh_per_kg is None without a batch weight, as from EnergyMeter.
+    """
+    time = np.asarray(time, dtype=np.float64)
+    hours = np.diff(time) / 60
+    burner = np.broadcast_to(np.asarray(burner_kw, dtype=np.float64), time.shape)
+    fan = np.broadcast_to(fan_power(fan_speed), time.shape)
+    gas_kwh = float((0.5 * (burner[1:] + burner[:-1]) * hours).sum())
+    fan_kwh = float((0.5 * (fan[1:] + fan[:-1]) * hours).sum())
+    totals = dict(zip(ENERGY_COLUMNS, (float(v) for v in _totals(gas_kwh, fan_kwh, batch_kg))))
+    if np.isnan(totals["energy_kwh_per_kg"]):
+        totals["energy_kwh_per_kg"] = None
+    return totals
+
+
+def shift_of(hours):
+    """Shift name for each hour of day (vectorized)"""
+    by_hour = np.empty(24, dtype=object)
+    for name, first, end in SHIFTS:
+        by_hour[np.arange(first, first + (end - first) % 24) % 24] = name
+    return by_hour[np.asarray(hours, dtype=np.intp)]
+
+
+def energy_frame(metadata):
+    """Per-roast energy table from archive metadata (RoastArchive.metadata_frame)
+
+    Roasts archived with energy totals keep them. Older ones are costed
+    at their burner and fan settings over their duration, or at the roast
+    model's defaults when even those are missing. Adds batch_kg, shift and
+    every ENERGY_COLUMNS column, all computed column-wise.
+    """
+    frame = metadata.copy()
+    for column in ["machine_id", "start_time", "duration", "batch_size", *PROFILE_COLUMNS, *ENERGY_COLUMNS]:
+        if column not in frame:
+            frame[column] = np.nan
+    frame["batch_kg"] = pd.to_numeric(frame["batch_size"], errors="coerce") / 1000
+    hours = pd.to_numeric(frame["duration"], errors="coerce").to_numpy() / 60
+    burner = pd.to_numeric(frame["burner_power"], errors="coerce").fillna(DEFAULT_GAS).to_numpy()
+    fan = pd.to_numeric(frame["fan_speed"], errors="coerce").fillna(DEFAULT_FAN).to_numpy()
+    gas_kwh = pd.to_numeric(frame["gas_kwh"], errors="coerce").to_numpy()
+    fan_kwh = pd.to_numeric(frame["fan_kwh"], errors="coerce").to_numpy()
+    gas_kwh = np.where(np.isnan(gas_kwh), burner * hours, gas_kwh)
+    fan_kwh = np.where(np.isnan(fan_kwh), fan_power(fan) * hours, fan_kwh)
+    totals = _totals(gas_kwh, fan_kwh, frame["batch_kg"].to_numpy())
+    for column, values in zip(ENERGY_COLUMNS, totals):
+        frame[column] = values
+    started = pd.to_datetime(frame["start_time"], errors="coerce", format="ISO8601")
+    frame["shift"] = np.where(started.notna(), shift_of(started.dt.hour.fillna(0)), None)
+    return frame
+
+
+def energy_report(frame, by=("machine_id", "shift")):
+    """Energy per group: roasts, green coffee, kWh, gas and kWh per kg
+
+    kWh/kg is total energy over total coffee, so big batches weigh in
+    proportionally; roasts without a batch size are left out of it.
+    """
+    by = list(by)
+    weighed = frame["batch_kg"].gt(0)
+    grouped = frame.assign(
+        weighed_kwh=frame["energy_kwh"].where(weighed),
+        batch_kg=frame["batch_kg"].where(weighed),
+    ).groupby(by, dropna=False)
+    report = grouped.agg(
+        roasts=("energy_kwh", "size"),
+        batch_kg=("batch_kg", "sum"),
+        energy_kwh=("energy_kwh", "sum"),
+        gas_m3=("gas_m3", "sum"),
+        weighed_kwh=("weighed_kwh", "sum"),
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        report["energy_kwh_per_kg"] = np.where(report["batch_kg"] > 0,
+                                               report["weighed_kwh"] / report["batch_kg"], np.nan)
+    return report.drop(columns="weighed_kwh").reset_index()
+
+
+def least_efficient_profiles(frame, n=10, min_roasts=3, by=PROFILE_COLUMNS):
+    """The `n` roast profiles using the most energy per kg, among those roasted at least `min_roasts` times"""
+    report = energy_report(frame, by)
+    report = report[report["roasts"] >= min_roasts]
+    return report.sort_values("energy_kwh_per_kg", ascending=False, na_position="last").head(n)
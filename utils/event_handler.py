@@ -1,23 +1,123 @@
 import pandas as pd
 from datetime import datetime
 
+from utils.event_store import EVENT_COLUMNS
+
 class EventHandler:
-    def __init__(self):
+    """Event log, kept in memory or written through to an EventStore
+
+    With a store, events are tagged with the machine and the current
+    roast_id and survive reruns and restarts.
+    """
+
+    def __init__(self, store=None, machine_id=None):
         self.events = []
+        self.store = store
+        self.machine_id = machine_id
+        self.roast_id = None
+        self.cleared_at = None
+        self._next_id = 1
     
     def add_event(self, event_type, details=""):
         """Add a new event to the log"""
         timestamp = datetime.now()
+        if self.store is not None:
+            self.store.append(event_type, details, self.roast_id, self.machine_id, timestamp)
+            return
         self.events.append({
+            "id": self._next_id,
             "timestamp": timestamp,
             "event_type": event_type,
             "details": details
         })
+        self._next_id += 1
     
-    def get_events_df(self):
-        """Return events as a pandas DataFrame"""
-        return pd.DataFrame(self.events)
+    def get_events_df(self, limit=None, offset=0, after_id=None, newest_first=False):
+        """Return events as a pandas DataFrame, oldest first
+
+        limit and offset select a page counting back from the newest event;
+        after_id only returns events logged after the one with that id.
+        """
+        newest_first_page = newest_first or limit is not None
+        if self.store is not None:
+            events = self.store.query(
+                machine_id=self.machine_id, since=self.cleared_at, limit=limit, offset=offset,
+                after_id=after_id, newest_first=newest_first_page
+            )
+            events = events[EVENT_COLUMNS + ["id"]]
+        else:
+            events = pd.DataFrame(
+                [e for e in self.events if after_id is None or e["id"] > after_id], columns=EVENT_COLUMNS + ["id"]
+            )
+            if newest_first_page:
+                events = events.iloc[::-1]
+                events = events.iloc[offset:None if limit is None else offset + limit]
+        if newest_first_page and not newest_first:
+            events = events.iloc[::-1]
+        return events.reset_index(drop=True)
+    
+    def count_events(self, after_id=None):
+        """Number of events in the log, or only of those logged after `after_id`"""
+        if self.store is not None:
+            return self.store.count(machine_id=self.machine_id, since=self.cleared_at, after_id=after_id)
+        return sum(1 for e in self.events if after_id is None or e["id"] > after_id)
     
     def clear_events(self):
-        """Clear all events"""
+        """Clear all events
+
+        A stored log is append-only, so this only hides earlier events.
+        """
         self.events = []
+        self.cleared_at = datetime.now()
+
+
+class EventWindow:
+    """One page of an event log, newest first, refreshed incrementally
+
+    Only the page on screen is read from the log. While that is the
+    newest page, a refresh only fetches the events logged since the last
+    one, so its cost doesn't grow with the log.
+    """
+
+    def __init__(self, handler, page_size=50):
+        self.handler = handler
+        self.page_size = page_size
+        self.total = 0
+        self.frame = None
+        self._key = None
+        self._last_id = 0
+
+    @property
+    def pages(self):
+        return max(1, -(-self.total // self.page_size))
+
+    def _fetch(self, page):
+        self.frame = self.handler.get_events_df(
+            limit=self.page_size, offset=page * self.page_size, newest_first=True
+        )
+
+    def refresh(self, page=0):
+        """Return the events on `page` (0 is the newest) as a DataFrame, newest first"""
+        key = (page, self.handler.cleared_at)
+        if key != self._key:
+            self._key = key
+            self.total = self.handler.count_events()
+            newest = self.handler.get_events_df(limit=1, newest_first=True)["id"]
+            self._last_id = int(newest.iloc[0]) if len(newest) else 0
+            self._fetch(page)
+            return self.frame
+
+        # Checking for new events is cheap; building even an empty frame is not
+        if not self.handler.count_events(after_id=self._last_id):
+            return self.frame
+        new = self.handler.get_events_df(after_id=self._last_id, newest_first=True)
+        self.total += len(new)
+        self._last_id = int(new["id"].max())
+        if page == 0:
+            if len(self.frame):
+                new = pd.concat([new, self.frame], ignore_index=True)
+            self.frame = new.iloc[:self.page_size]
+        else:
+            # Older pages shift back as events arrive
+            self._fetch(page)
+        return self.frame
@@ -0,0 +1,202 @@
+import atexit
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+DEFAULT_PATH = os.environ.get("ROAST_EVENT_DB", os.path.join("data", "roast_events.db"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS roasts (
+    roast_id TEXT PRIMARY KEY,
+    machine_id TEXT,
+    bean_type TEXT,
+    origin TEXT,
+    roast_level TEXT,
+    batch_size REAL,
+    started_at REAL
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    roast_id TEXT,
+    machine_id TEXT,
+    timestamp REAL NOT NULL,
+    event_type TEXT NOT NULL,
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS events_roast ON events (roast_id, event_type, timestamp);
+CREATE INDEX IF NOT EXISTS events_type_time ON events (event_type, timestamp);
+CREATE INDEX IF NOT EXISTS events_machine_time ON events (machine_id, timestamp);
+CREATE INDEX IF NOT EXISTS roasts_origin ON roasts (origin, bean_type);
+"""
+
+EVENT_COLUMNS = ["timestamp", "event_type", "details"]
+
+# Roast parameters kept in the roasts table
+ROAST_METADATA = ("bean_type", "origin", "roast_level", "batch_size")
+
+
+def _epoch(value):
+    """Unix time for a datetime (naive means local time), passing numbers through"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, pd.Timestamp):
+        value = value.to_pydatetime()
+    return value.timestamp()
+
+
+class EventStore:
+    """Append-only roast event log in SQLite (WAL mode)
+
+    Events are buffered and written in batches: a batch is committed once
+    it reaches `batch_size` events or, from a timer, `flush_interval`
+    seconds after its first event. Queries commit it first so reads see
+    every write, and close() (also run at interpreter exit) commits what
+    is left.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, batch_size=32, flush_interval=1.0):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._pending = []
+        self._timer = None
+        self._closed = False
+        atexit.register(self.close)
+
+    def register_roast(self, roast_id, machine_id=None, bean_type=None, origin=None,
+                       roast_level=None, batch_size=None, started_at=None):
+        """Record a roast's metadata so its events can be filtered by it"""
+        started_at = _epoch(started_at or datetime.now())
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO roasts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (roast_id, machine_id, bean_type, origin, roast_level, batch_size, started_at),
+            )
+            self._conn.commit()
+
+    def append(self, event_type, details="", roast_id=None, machine_id=None, timestamp=None):
+        """Queue one event for writing"""
+        timestamp = _epoch(timestamp or datetime.now())
+        with self._lock:
+            self._pending.append((roast_id, machine_id, timestamp, event_type, details))
+            if len(self._pending) >= self.batch_size:
+                self._flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def append_many(self, events):
+        """Queue (event_type, details, roast_id, machine_id, timestamp) tuples and write them"""
+        with self._lock:
+            self._pending.extend(
+                (roast_id, machine_id, _epoch(timestamp or datetime.now()), event_type, details)
+                for event_type, details, roast_id, machine_id, timestamp in events
+            )
+            self._flush()
+
+    def _flush(self):
+        if self._pending:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO events (roast_id, machine_id, timestamp, event_type, details) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    self._pending,
+                )
+            self._pending = []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def flush(self):
+        with self._lock:
+            if not self._closed:
+                self._flush()
+
+    @staticmethod
+    def _where(roast_id=None, machine_id=None, event_type=None, origin=None, bean_type=None,
+               since=None, until=None, after_id=None):
+        clauses, params = [], []
+        # Events after an id are few: unary + keeps SQLite on the rowid range
+        # instead of scanning a machine's whole history through its index
+        unindexed = "+" if after_id is not None else ""
+        for column, value in (("e.roast_id", roast_id), ("e.machine_id", machine_id),
+                              ("e.event_type", event_type), ("r.origin", origin),
+                              ("r.bean_type", bean_type)):
+            if value is not None:
+                clauses.append(f"{unindexed}{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("e.timestamp >= ?")
+            params.append(_epoch(since))
+        if until is not None:
+            clauses.append("e.timestamp < ?")
+            params.append(_epoch(until))
+        if after_id is not None:
+            clauses.append("e.id > ?")
+            params.append(int(after_id))
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def query(self, roast_id=None, machine_id=None, event_type=None, origin=None, bean_type=None,
+              since=None, until=None, limit=None, newest_first=False, offset=None, after_id=None):
+        """Return matching events as a DataFrame, oldest first
+
+        Every filter is optional and served from an index, e.g.
+        query(event_type="First Crack", origin="Ethiopia", since=month_ago).
+        limit and offset select one page; after_id only returns events
+        written after the one with that id, for incremental refreshes.
+        """
+        where, params = self._where(roast_id, machine_id, event_type, origin, bean_type, since, until, after_id)
+        sql = ("SELECT e.timestamp, e.event_type, e.details, e.roast_id, e.machine_id, "
+               "r.origin, r.bean_type, e.id FROM events e LEFT JOIN roasts r USING (roast_id)" + where)
+        sql += " ORDER BY e.timestamp DESC, e.id DESC" if newest_first else " ORDER BY e.timestamp, e.id"
+        if limit is not None or offset:
+            sql += f" LIMIT {-1 if limit is None else int(limit)}"
+        if offset:
+            sql += f" OFFSET {int(offset)}"
+
+        with self._lock:
+            self._flush()
+            rows = self._conn.execute(sql, params).fetchall()
+        frame = pd.DataFrame(rows, columns=EVENT_COLUMNS + ["roast_id", "machine_id", "origin", "bean_type", "id"])
+        frame["timestamp"] = pd.to_datetime(frame["timestamp"].map(datetime.fromtimestamp))
+        return frame
+
+    def count(self, roast_id=None, machine_id=None, event_type=None, origin=None, bean_type=None,
+              since=None, until=None, after_id=None):
+        """Number of events matching the same filters as query()"""
+        where, params = self._where(roast_id, machine_id, event_type, origin, bean_type, since, until, after_id)
+        join = " LEFT JOIN roasts r USING (roast_id)" if origin is not None or bean_type is not None else ""
+        with self._lock:
+            self._flush()
+            return self._conn.execute(f"SELECT COUNT(*) FROM events e{join}{where}", params).fetchone()[0]
+
+    def first_event(self, roast_id, event_type):
+        """Timestamp of the first event of a type in a roast, or None"""
+        with self._lock:
+            self._flush()
+            row = self._conn.execute(
+                "SELECT timestamp FROM events WHERE roast_id = ? AND event_type = ? "
+                "ORDER BY timestamp LIMIT 1",
+                (roast_id, event_type),
+            ).fetchone()
+        return datetime.fromtimestamp(row[0]) if row else None
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._flush()
+            self._conn.close()
+            self._closed = True
+        atexit.unregister(self.close)
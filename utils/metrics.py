@@ -0,0 +1,233 @@
+import functools
+import itertools
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds (seconds) of the latency buckets, roughly log-spaced from 50 µs to 10 s
+DEFAULT_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Fixed-bucket latency histogram, safe to observe from any thread
+
+    observe() is a bisect and three additions under a lock. Buckets are
+    stored per bucket and made cumulative only when rendered.
+
+    For blocks that run thousands of times a second, `sample` times only
+    one call in every `sample` and counts each observation `sample` times,
+    so counts and sums stay estimates of the totals while the skipped calls
+    cost a counter increment.
+    """
+
+    def __init__(self, name, help="", buckets=DEFAULT_BUCKETS, sample=1):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.sample = sample
+        self._calls = itertools.count()
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value, weight=1):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[i] += weight
+            self._sum += value * weight
+            self._count += weight
+
+    def start(self):
+        """Start timing a call: perf_counter(), or None when this call isn't sampled"""
+        if self.sample > 1 and next(self._calls) % self.sample:
+            return None
+        return time.perf_counter()
+
+    def stop(self, start):
+        """Observe the time since start(); returns it, or None when not sampled"""
+        if start is None:
+            return None
+        elapsed = time.perf_counter() - start
+        self.observe(elapsed, self.sample)
+        return elapsed
+
+    def time(self):
+        """Context manager observing the duration of its block"""
+        return Timer(self)
+
+    def snapshot(self):
+        """(per-bucket counts, sum, count) at one instant"""
+        with self._lock:
+            return list(self._counts), self._sum, self._count
+
+    def quantile(self, q, snapshot=None):
+        """Estimate a quantile by interpolating within its bucket, like PromQL's histogram_quantile"""
+        counts, _, count = snapshot or self.snapshot()
+        if count == 0:
+            return None
+        rank = q * count
+        seen = 0
+        for i, n in enumerate(counts):
+            if n and seen + n >= rank:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+    def render(self):
+        counts, total, count = self.snapshot()
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        cumulative = 0
+        for bound, n in zip(self.buckets, counts):
+            cumulative += n
+            lines.append(f'{self.name}_bucket{{le="{bound:g}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {count}')
+        lines.append(f"{self.name}_sum {total:.9g}")
+        lines.append(f"{self.name}_count {count}")
+        return "\n".join(lines)
+
+
+class Timer:
+    """Times a block into a histogram; usable as a context manager or with start()/stop()"""
+
+    __slots__ = ("histogram", "_start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self._start = None
+
+    def start(self):
+        self._start = self.histogram.start()
+        return self
+
+    def stop(self):
+        return self.histogram.stop(self._start)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class MetricsRegistry:
+    """Named latency histograms for the dashboard's hot paths
+
+    Hooks are cheap enough to leave on: they wrap whole batches, renders or
+    reruns rather than single samples, and the hottest ones are sampled.
+    The registry renders in the Prometheus text exposition format, for
+    serve() or write_textfile().
+    """
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name, help="", sample=1):
+        """The histogram called `name`, created on first use"""
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, Histogram(name, help, sample=sample))
+        return histogram
+
+    def timer(self, name, help="", sample=1):
+        return Timer(self.histogram(name, help, sample))
+
+    def timed(self, name, help="", sample=1):
+        """Decorator timing calls of a function"""
+        def decorator(func):
+            histogram = self.histogram(name, help or f"Duration of {func.__qualname__} in seconds", sample)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = histogram.start()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    histogram.stop(start)
+            return wrapper
+        return decorator
+
+    def render(self):
+        """All histograms in the Prometheus text format"""
+        with self._lock:
+            histograms = sorted(self._histograms.values(), key=lambda h: h.name)
+        return "".join(h.render() + "\n" for h in histograms)
+
+    def summary(self):
+        """Rows of (name, count, mean, p50, p99) in milliseconds, for display"""
+        with self._lock:
+            histograms = sorted(self._histograms.values(), key=lambda h: h.name)
+        rows = []
+        for h in histograms:
+            snapshot = h.snapshot()
+            _, total, count = snapshot
+            if count:
+                rows.append({
+                    "metric": h.name,
+                    "count": count,
+                    "mean ms": 1000 * total / count,
+                    "p50 ms": 1000 * h.quantile(0.5, snapshot),
+                    "p99 ms": 1000 * h.quantile(0.99, snapshot),
+                })
+        return rows
+
+    def write_textfile(self, path):
+        """Write render() to `path` atomically (node_exporter textfile collector style)"""
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+    def start_file_sink(self, path, interval=10.0):
+        """Rewrite `path` every `interval` seconds from a daemon thread"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        def run():
+            while True:
+                self.write_textfile(path)
+                time.sleep(interval)
+        thread = threading.Thread(target=run, name="metrics-file-sink", daemon=True)
+        thread.start()
+        return thread
+
+    def serve(self, port, host="127.0.0.1"):
+        """Serve render() at http://host:port/metrics from a daemon thread; returns the server"""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+
+# One registry per process, shared by every Streamlit session and roast worker
+metrics = MetricsRegistry()
@@ -0,0 +1,179 @@
+import importlib
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from utils.analysis import FLAVOR_BANDS
+from utils.metrics import metrics
+from utils.roast_model import DEFAULT_FAN, DEFAULT_GAS, predict_crack_times, simulate_roasts
+
+# Run-to-run spread of what the operator sets: (kind, size). "abs" is a
+# standard deviation in the setting's units, "rel" a fraction of it.
+NOISE = {
+    "charge_temp": ("abs", 3.0),   # °C, drum preheat reached
+    "batch_size": ("rel", 0.03),   # weighing
+    "gas": ("rel", 0.05),          # burner pressure
+    "fan": ("abs", 0.03),          # damper position
+}
+
+# Outcome arrays, all shaped (charge temps, development times, samples)
+OUTCOMES = ("first_crack", "second_crack", "final_temp", "duration")
+
+# Simulated roast length (minutes); roasts drop at its end if they haven't before
+HORIZON = 25.0
+
+# Scenarios per worker task: large enough to amortize solve_ivp's per-step
+# overhead, small enough to keep every worker busy and memory bounded
+CHUNK = 1000
+
+
+def _noisy(value, kind, size, rng, n):
+    value = np.full(n, value, dtype=np.float64)
+    if kind == "rel":
+        return value * (1 + rng.normal(0, size, n))
+    return value + rng.normal(0, size, n)
+
+
+def _simulate_chunk(shm_name, shape, task):
+    """Worker: simulate one chunk of samples for one charge temperature into shared memory"""
+    i, start, stop, seed, setting, development_times = task
+    n = stop - start
+    rng = np.random.default_rng(seed)
+    bean_type, origin, batch_kg, charge_temp, gas, fan = setting
+    batch = np.maximum(_noisy(batch_kg, *NOISE["batch_size"], rng, n), 0.01)
+    charge = _noisy(charge_temp, *NOISE["charge_temp"], rng, n)
+    gas = np.maximum(_noisy(gas, *NOISE["gas"], rng, n), 0.0)
+    fan = np.clip(_noisy(fan, *NOISE["fan"], rng, n), 0.0, 1.0)
+
+    result = simulate_roasts(bean_type, origin, batch, charge, gas=gas, fan=fan, duration=HORIZON, points=301)
+    first, second = predict_crack_times(result, bean_type)
+
+    # Development time is the share of the roast after first crack, so it
+    # only moves the drop: every development time comes from the same runs
+    development = np.asarray(development_times, dtype=np.float64)[:, None] / 100
+    drop = np.where(np.isnan(first), HORIZON, np.minimum(HORIZON, first / (1 - development)))
+    time, bean = result["time"], result["bean"]
+    j = np.clip(np.searchsorted(time, drop), 1, len(time) - 1)
+    rows = np.arange(n)
+    frac = (drop - time[j - 1]) / (time[j] - time[j - 1])
+    final_temp = bean[rows, j - 1] + frac * (bean[rows, j] - bean[rows, j - 1])
+
+    shm = SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        out[0, i, :, start:stop] = first
+        out[1, i, :, start:stop] = np.where(second <= drop, second, np.nan)
+        out[2, i, :, start:stop] = final_temp
+        out[3, i, :, start:stop] = drop
+        del out
+    finally:
+        shm.close()
+
+
+def _ready():
+    pass
+
+
+def default_pool(workers=None):
+    """A process pool for explore_outcomes, with every worker started before it returns
+
+    Workers are forked: spawned ones would re-run the process's main
+    module, which under Streamlit is the dashboard script. Everything a
+    worker needs is imported first and all workers are forked in this
+    call, so none is forked in the middle of an import in another thread.
+    """
+    # Imported here, before forking, rather than in each worker
+    importlib.import_module("scipy.integrate")
+    # Workers forked before the resource tracker starts would each start
+    # their own, which unlinks the shared results when the worker exits
+    resource_tracker.ensure_running()
+
+    workers = workers or os.cpu_count()
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("fork"))
+    # A fork pool starts all its workers on the first submit
+    pool.submit(_ready).result()
+    return pool
+
+
+@metrics.timed("roast_explore_seconds", "Time to run one Monte Carlo outcome exploration")
+def explore_outcomes(bean_type, origin, batch_kg, charge_temps, development_times,
+                     gas=DEFAULT_GAS, fan=DEFAULT_FAN, samples=1000, seed=None, pool=None):
+    """Monte Carlo roast outcomes over a charge temperature x development time grid
+
+    Each charge temperature is simulated `samples` times with the roast
+    model, perturbing the settings by NOISE, in chunks spread over a
+    process pool. Every chunk draws from its own child of one SeedSequence,
+    so results depend on the seed but not on the number of workers.
+    Workers write straight into one shared-memory block rather than
+    pickling results back. Pass a long-lived `pool` (default_pool()) to
+    skip worker start-up; without one a pool is started for the call.
+
+    Returns RoastOutcomes.
+    """
+    charge_temps = np.asarray(charge_temps, dtype=np.float64)
+    development_times = np.asarray(development_times, dtype=np.float64)
+    shape = (len(OUTCOMES), len(charge_temps), len(development_times), samples)
+    chunks = [(start, min(start + CHUNK, samples)) for start in range(0, samples, CHUNK)]
+    seeds = iter(np.random.SeedSequence(seed).spawn(len(charge_temps) * len(chunks)))
+    tasks = [
+        (i, start, stop, next(seeds), (bean_type, origin, batch_kg, float(charge_temp), gas, fan), development_times)
+        for i, charge_temp in enumerate(charge_temps)
+        for start, stop in chunks
+    ]
+
+    shm = SharedMemory(create=True, size=int(np.prod(shape)) * 8)
+    try:
+        own_pool = pool is None
+        if own_pool:
+            pool = default_pool(min(os.cpu_count(), len(tasks)))
+        try:
+            for future in [pool.submit(_simulate_chunk, shm.name, shape, task) for task in tasks]:
+                future.result()
+        finally:
+            if own_pool:
+                pool.shutdown()
+        results = np.ndarray(shape, dtype=np.float64, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+    return RoastOutcomes(charge_temps, development_times, dict(zip(OUTCOMES, results)))
+
+
+class RoastOutcomes:
+    """Outcome distributions from explore_outcomes
+
+    Each of OUTCOMES is an array of shape (charge temps, development
+    times, samples); cracks that don't happen before the drop are NaN.
+    flavor holds the index into FLAVOR_BANDS predicted from duration.
+    """
+
+    def __init__(self, charge_temps, development_times, outcomes):
+        self.charge_temps = charge_temps
+        self.development_times = development_times
+        self.outcomes = outcomes
+        longest = np.array([band for band, _ in FLAVOR_BANDS])
+        self.flavor = np.searchsorted(longest, outcomes["duration"]).astype(np.int8)
+
+    @property
+    def samples(self):
+        return self.flavor.shape[-1]
+
+    def quantile(self, outcome, q):
+        """Per-cell quantile of an outcome, ignoring cracks that didn't happen"""
+        with warnings.catch_warnings():
+            # Cells where it never happened are NaN
+            warnings.simplefilter("ignore", RuntimeWarning)
+            return np.nanquantile(self.outcomes[outcome], q, axis=-1)
+
+    def reached(self, outcome):
+        """Per-cell share of samples where an outcome happened (e.g. second crack before the drop)"""
+        return (~np.isnan(self.outcomes[outcome])).mean(axis=-1)
+
+    def flavor_share(self, name):
+        """Per-cell share of samples predicted to taste like flavor `name`"""
+        index = next(i for i, (_, flavor) in enumerate(FLAVOR_BANDS) if flavor.name == name)
+        return (self.flavor == index).mean(axis=-1)
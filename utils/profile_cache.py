@@ -0,0 +1,119 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from utils.roast_model import simulate_roast_profile
+
+
+class ProfileCache:
+    """Thread-safe LRU cache with a time-to-live and a memory budget
+
+    Entries are evicted least-recently-used first when either the entry
+    count or the total size in bytes exceeds its limit. Cached values are
+    shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, maxsize=256, ttl=3600, max_bytes=64 * 1024 * 1024, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (expires_at, nbytes, value)
+        self._lock = threading.Lock()
+        self._nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def _sizeof(cls, value):
+        if isinstance(value, tuple):
+            return sum(cls._sizeof(item) for item in value)
+        if hasattr(value, 'memory_usage'):
+            return int(value.memory_usage(deep=True).sum())
+        return int(getattr(value, 'nbytes', 0))
+
+    def _pop(self, key):
+        _, nbytes, _ = self._entries.pop(key)
+        self._nbytes -= nbytes
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self._clock():
+                self._pop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key, value):
+        """Store a value, evicting old entries to stay within the limits"""
+        nbytes = self._sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            if nbytes > self.max_bytes:
+                return
+            self._entries[key] = (self._clock() + self.ttl, nbytes, value)
+            self._nbytes += nbytes
+            while len(self._entries) > self.maxsize or self._nbytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_or_create(self, key, factory):
+        """Return the cached value for key, calling factory() to fill a miss"""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = factory()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def stats(self):
+        """Return hit/miss counters and current usage"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._nbytes,
+            }
+
+
+# One cache per process, shared by every Streamlit session
+profile_cache = ProfileCache(
+    maxsize=int(os.environ.get("PROFILE_CACHE_SIZE", 256)),
+    ttl=float(os.environ.get("PROFILE_CACHE_TTL", 3600)),
+    max_bytes=int(os.environ.get("PROFILE_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+)
+
+
+def get_simulated_profile(bean_type, roast_level, origin, batch_size, charge_temp, development_time, gas, fan):
+    """Return (profile, first crack, second crack) from the roast model, reusing a cached copy
+
+    Keyed by every input of the simulation: (bean_type, roast_level,
+    charge_temp, development_time) plus the batch's origin, weight (kg),
+    burner and fan. There is no seed: the model is deterministic, and probe
+    noise is added by the data source.
+    """
+    key = (bean_type, roast_level, charge_temp, development_time, origin, batch_size, gas, fan)
+    return profile_cache.get_or_create(
+        key,
+        lambda: simulate_roast_profile(
+            bean_type, origin, batch_size, charge_temp, development_time, gas, fan, roast_level=roast_level
+        ),
+    )
@@ -1,48 +1,134 @@
 import numpy as np
 import pandas as pd
 
-def generate_roast_profile(bean_type, roast_level, charge_temp, development_time):
-    """Generate a simulated roast profile based on parameters"""
+from utils.metrics import metrics
+
+# Base (final temperature °C, duration min) for each roast level
+ROAST_LEVELS = {
+    "Light": (195, 8),
+    "Medium": (210, 10),
+    "Dark": (225, 12),
+    "French": (240, 14),
+    "Italian": (250, 16),
+}
+
+# (final temperature, duration) offsets by bean type
+BEAN_ADJUSTMENTS = {
+    "Robusta": (5, -1),
+    "Liberica": (-3, 1),
+}
+
+NUM_POINTS = 100
+
+
+def _level_params(roast_level):
+    # Unknown levels fall back to the darkest roast, as before
+    return ROAST_LEVELS.get(roast_level, ROAST_LEVELS["Italian"])
+
+
+def _bean_params(bean_type):
+    return BEAN_ADJUSTMENTS.get(bean_type, (0, 0))
+
+
+@metrics.timed("roast_profile_generate_seconds", "Time to generate one target roast profile")
+def generate_roast_profile(bean_type, roast_level, charge_temp, development_time, seed=None):
+    """Generate a simulated roast profile based on parameters
+
+    With a seed the profile is drawn from its own Generator and is
+    reproducible; without one the global np.random state is used.
+    """
+    rng = np.random if seed is None else np.random.default_rng(seed)
+
     # Base parameters based on roast level
-    if roast_level == "Light":
-        final_temp = 195 + np.random.normal(0, 2)
-        duration = 8 + np.random.normal(0, 0.5)
-    elif roast_level == "Medium":
-        final_temp = 210 + np.random.normal(0, 2)
-        duration = 10 + np.random.normal(0, 0.5)
-    elif roast_level == "Dark":
-        final_temp = 225 + np.random.normal(0, 2)
-        duration = 12 + np.random.normal(0, 0.5)
-    elif roast_level == "French":
-        final_temp = 240 + np.random.normal(0, 2)
-        duration = 14 + np.random.normal(0, 0.5)
-    else:  # Italian
-        final_temp = 250 + np.random.normal(0, 2)
-        duration = 16 + np.random.normal(0, 0.5)
-    
+    base_temp, base_duration = _level_params(roast_level)
+    final_temp = base_temp + rng.normal(0, 2)
+    duration = base_duration + rng.normal(0, 0.5)
+
     # Adjust based on bean type
-    if bean_type == "Robusta":
-        final_temp += 5
-        duration -= 1
-    elif bean_type == "Liberica":
-        final_temp -= 3
-        duration += 1
-    
+    temp_offset, duration_offset = _bean_params(bean_type)
+    final_temp += temp_offset
+    duration += duration_offset
+
     # Generate time points
-    time_points = np.linspace(0, duration, num=100)
-    
+    time_points = np.linspace(0, duration, num=NUM_POINTS)
+
     # Generate temperature curve (cubic function)
     x = time_points / duration
     temp_curve = charge_temp + (final_temp - charge_temp) * (x**3)
-    
+
     # Add some random noise to make it realistic
-    noise = np.random.normal(0, 0.5, size=len(temp_curve))
+    noise = rng.normal(0, 0.5, size=len(temp_curve))
     temp_curve += noise
-    
+
     # Create DataFrame
     profile = pd.DataFrame({
         'Time': time_points,
         'Temperature': temp_curve
     })
-    
+
     return profile
+
+
+def _lookup(values, params):
+    """Map an array of names to parameter columns, resolving each unique name once"""
+    names, inverse = np.unique(values, return_inverse=True)
+    table = np.array([params(name) for name in names], dtype=np.float64).reshape(-1, 2)
+    return table[inverse, 0], table[inverse, 1]
+
+
+def generate_roast_profiles(bean_types, roast_levels, charge_temps, development_times,
+                            seed=None, num_points=NUM_POINTS):
+    """Generate many roast profiles in one vectorized pass
+
+    Parameters are broadcast against each other, so scalars and arrays can
+    be mixed. Uses the same model as generate_roast_profile, drawing from a
+    seeded Generator so results are reproducible. Returns (time, temperature)
+    as two arrays of shape (n_profiles, num_points).
+    """
+    bean_types, roast_levels, charge_temps, development_times = (
+        a.ravel() for a in np.broadcast_arrays(
+            np.asarray(bean_types), np.asarray(roast_levels),
+            np.asarray(charge_temps, dtype=np.float64),
+            np.asarray(development_times, dtype=np.float64),
+        )
+    )
+    n = len(charge_temps)
+    rng = np.random.default_rng(seed)
+
+    base_temp, base_duration = _lookup(roast_levels, _level_params)
+    temp_offset, duration_offset = _lookup(bean_types, _bean_params)
+    final_temp = base_temp + rng.normal(0, 2, size=n) + temp_offset
+    duration = base_duration + rng.normal(0, 0.5, size=n) + duration_offset
+
+    x = np.linspace(0, 1, num=num_points)
+    time = duration[:, None] * x
+    temperature = (charge_temps[:, None]
+                   + (final_temp - charge_temps)[:, None] * x**3
+                   + rng.normal(0, 0.5, size=(n, num_points)))
+    return time, temperature
+
+
+def catalog_grid(bean_types, roast_levels, charge_temps, development_times):
+    """Return flat parameter arrays covering every combination of the inputs"""
+    grids = np.meshgrid(
+        np.asarray(bean_types), np.asarray(roast_levels),
+        np.asarray(charge_temps), np.asarray(development_times),
+        indexing='ij',
+    )
+    return tuple(g.ravel() for g in grids)
+
+
+def profiles_to_frame(time, temperature, **params):
+    """Convert batch output to a long-format DataFrame
+
+    Extra keyword arrays (e.g. bean_type=...) are attached per profile.
+    """
+    n, num_points = temperature.shape
+    frame = pd.DataFrame({
+        'Profile': np.repeat(np.arange(n), num_points),
+        'Time': time.ravel(),
+        'Temperature': temperature.ravel(),
+    })
+    for name, values in params.items():
+        frame[name] = np.repeat(np.broadcast_to(values, (n,)), num_points)
+    return frame
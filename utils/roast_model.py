@@ -0,0 +1,204 @@
+import numpy as np
+import pandas as pd
+
+from utils.profile_generator import ROAST_LEVELS
+
+# Drum roaster constants (per minute, kJ and °C)
+MACHINE = {
+    "drum_capacity": 4.0,      # kJ/K, steel drum
+    "air_capacity": 0.4,       # kJ/K, air in the drum
+    "burner_efficiency": 0.9,  # share of gas power reaching the drum
+    "drum_to_air": 3.0,        # kJ/min/K
+    "drum_loss": 0.15,         # kJ/min/K, drum shell to room
+    "exhaust_base": 0.15,      # kJ/min/K, air leaving with the fan off
+    "exhaust_fan": 0.6,        # kJ/min/K, extra at full fan
+    "contact_per_kg": 1.0,     # kJ/min/K per kg, drum to bean conduction
+    "convection_per_kg": 0.6,  # kJ/min/K per kg, air to bean at fan off
+    "convection_fan": 1.0,     # relative convection boost at full fan
+    "ambient": 25.0,           # °C
+}
+
+# Bean properties by type: specific heat (kJ/kg/K) and crack temperatures (°C)
+BEAN_PROPERTIES = {
+    "Arabica": {"specific_heat": 1.65, "first_crack": 196.0, "second_crack": 224.0},
+    "Robusta": {"specific_heat": 1.75, "first_crack": 200.0, "second_crack": 228.0},
+    "Liberica": {"specific_heat": 1.70, "first_crack": 194.0, "second_crack": 222.0},
+    "Excelsa": {"specific_heat": 1.70, "first_crack": 195.0, "second_crack": 223.0},
+    "Blend": {"specific_heat": 1.68, "first_crack": 197.0, "second_crack": 225.0},
+}
+
+# Green bean moisture content (kg water / kg bean) by origin
+ORIGIN_MOISTURE = {
+    "Colombia": 0.11,
+    "Ethiopia": 0.10,
+    "Brazil": 0.105,
+    "Vietnam": 0.12,
+    "Indonesia": 0.125,
+    "Kenya": 0.105,
+    "Guatemala": 0.11,
+}
+
+LATENT_HEAT = 2260.0   # kJ/kg water
+EXOTHERM = 6.0         # kJ/min per kg around and after first crack
+
+DEFAULT_GAS = 2.2      # kW
+DEFAULT_FAN = 0.4      # 0 (off) to 1 (full)
+
+
+def _control(value, t, n):
+    # Controls are scalars, per-scenario arrays, or callables of time (minutes)
+    if callable(value):
+        value = value(t)
+    return np.broadcast_to(np.asarray(value, dtype=np.float64), (n,))
+
+
+def _lookup(names, table, field=None, default=None):
+    names, inverse = np.unique(np.asarray(names), return_inverse=True)
+    values = []
+    for name in names:
+        entry = table.get(name, default)
+        values.append(entry[field] if field else entry)
+    return np.asarray(values, dtype=np.float64)[inverse]
+
+
+def simulate_roasts(bean_types, origins, batch_sizes, charge_temps, gas=DEFAULT_GAS, fan=DEFAULT_FAN,
+                    duration=20.0, points=241, rtol=1e-4, crack_offsets=0.0):
+    """Simulate many drum roasts at once with a lumped heat-transfer model
+
+    Each scenario has drum, air and bean temperatures plus bean moisture.
+    The burner heats the drum; the drum heats the air and (by contact) the
+    beans; the air heats the beans by convection and leaves through the
+    exhaust. Evaporation cools the beans early on and the roast turns
+    mildly exothermic near first crack. Beans are charged at room
+    temperature into a drum and air preheated to charge_temp.
+
+    Scenario parameters broadcast against each other. batch_sizes are in
+    kg; gas (kW) and fan (0-1) may be scalars, per-scenario arrays, or
+    callables f(t_minutes) returning either. crack_offsets (°C) move the
+    first crack exotherm off the bean type's temperature, for lots that
+    crack early or late. All scenarios are integrated
+    together as one vectorized system with scipy's solve_ivp.
+
+    Returns a dict of arrays: time (points,), and bean, air, drum and
+    moisture of shape (n_scenarios, points).
+    """
+    # Imported here so the dashboard and crack detector start without scipy.integrate
+    from scipy.integrate import solve_ivp
+
+    controls = [np.asarray(c) for c in (gas, fan) if not callable(c)]
+    shape = np.broadcast_shapes(*(np.shape(p) for p in (bean_types, origins, batch_sizes, charge_temps,
+                                                        crack_offsets)),
+                                *(c.shape for c in controls))
+    n = int(np.prod(shape))
+    bean_types, origins = (np.broadcast_to(p, shape).ravel() for p in (bean_types, origins))
+    batch = np.broadcast_to(np.asarray(batch_sizes, dtype=np.float64), shape).ravel()
+    charge = np.broadcast_to(np.asarray(charge_temps, dtype=np.float64), shape).ravel()
+    m = MACHINE
+
+    bean_capacity = batch * _lookup(bean_types, BEAN_PROPERTIES, "specific_heat", BEAN_PROPERTIES["Arabica"])
+    moisture0 = _lookup(origins, ORIGIN_MOISTURE, default=0.11)
+    first_crack = _lookup(bean_types, BEAN_PROPERTIES, "first_crack", BEAN_PROPERTIES["Arabica"])
+    first_crack = first_crack + np.broadcast_to(np.asarray(crack_offsets, dtype=np.float64), shape).ravel()
+    contact = m["contact_per_kg"] * batch
+    convection = m["convection_per_kg"] * batch
+
+    def rhs(t, y):
+        drum, air, bean, moisture = y.reshape(4, n)
+        gas_kw = _control(gas, t, n)
+        fan_level = _control(fan, t, n)
+
+        burner = 60.0 * m["burner_efficiency"] * gas_kw
+        drum_air = m["drum_to_air"] * (drum - air)
+        drum_bean = contact * (drum - bean)
+        air_bean = convection * (1 + m["convection_fan"] * fan_level) * (air - bean)
+        exhaust = (m["exhaust_base"] + m["exhaust_fan"] * fan_level) * (air - m["ambient"])
+        shell = m["drum_loss"] * (drum - m["ambient"])
+
+        # Drying speeds up steeply above ~100°C; latent heat comes out of the beans
+        drying = 0.35 * moisture * np.exp((np.minimum(bean, 250.0) - 160.0) / 25.0)
+        evaporation = LATENT_HEAT * batch * drying
+        exotherm = EXOTHERM * batch / (1 + np.exp(-(bean - first_crack) / 4.0))
+
+        return np.concatenate([
+            (burner - drum_air - drum_bean - shell) / m["drum_capacity"],
+            (drum_air - air_bean - exhaust) / m["air_capacity"],
+            (drum_bean + air_bean + exotherm - evaporation) / bean_capacity,
+            -drying,
+        ])
+
+    y0 = np.concatenate([charge, charge, np.full(n, m["ambient"]), moisture0])
+    time = np.linspace(0, duration, points)
+    solution = solve_ivp(rhs, (0, duration), y0, t_eval=time, rtol=rtol, atol=1e-3)
+    if not solution.success:
+        raise RuntimeError(f"roast simulation failed: {solution.message}")
+    drum, air, bean, moisture = solution.y.reshape(4, n, points)
+    return {"time": time, "bean": bean, "air": air, "drum": drum, "moisture": moisture}
+
+
+def crossing_times(time, curves, thresholds):
+    """First time each curve reaches its threshold (linear interpolation), NaN if never"""
+    thresholds = np.broadcast_to(np.asarray(thresholds, dtype=np.float64), (len(curves),))
+    above = curves >= thresholds[:, None]
+    reached = above.any(axis=1)
+    j = np.where(reached, above.argmax(axis=1), 0)
+    rows = np.arange(len(curves))
+    prev = np.maximum(j - 1, 0)
+    t0, t1 = time[prev], time[j]
+    y0, y1 = curves[rows, prev], curves[rows, j]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        frac = np.where(y1 > y0, (thresholds - y0) / (y1 - y0), 0.0)
+    crossing = t0 + np.clip(frac, 0, 1) * (t1 - t0)
+    return np.where(reached, crossing, np.nan)
+
+
+def predict_crack_times(result, bean_types):
+    """First and second crack times (minutes) for simulate_roasts output"""
+    bean_types = np.broadcast_to(np.asarray(bean_types), (len(result["bean"]),))
+    first = crossing_times(result["time"], result["bean"],
+                           _lookup(bean_types, BEAN_PROPERTIES, "first_crack", BEAN_PROPERTIES["Arabica"]))
+    second = crossing_times(result["time"], result["bean"],
+                            _lookup(bean_types, BEAN_PROPERTIES, "second_crack", BEAN_PROPERTIES["Arabica"]))
+    return first, second
+
+
+def simulate_roast_profile(bean_type, origin, batch_size, charge_temp, development_time,
+                           gas=DEFAULT_GAS, fan=DEFAULT_FAN, roast_level=None):
+    """Simulate one roast and cut it at the drop implied by development_time
+
+    development_time is the percentage of the roast spent after first
+    crack, so the drop comes at first_crack / (1 - development_time / 100).
+    A roast_level from ROAST_LEVELS caps the drop: the roast also ends once
+    the beans reach that level's final temperature, whichever comes first.
+    Returns (profile DataFrame with Time/Temperature, first crack, second
+    crack); a crack is None if it happens after the drop.
+    """
+    result = simulate_roasts(bean_type, origin, batch_size, charge_temp, gas, fan)
+    first, second = (float(c[0]) for c in predict_crack_times(result, bean_type))
+    drop = result["time"][-1]
+    if not np.isnan(first):
+        drop = min(drop, first / (1 - development_time / 100))
+    if roast_level in ROAST_LEVELS:
+        level_temp = float(crossing_times(result["time"], result["bean"], ROAST_LEVELS[roast_level][0])[0])
+        if not np.isnan(level_temp):
+            drop = min(drop, level_temp)
+    keep = result["time"] <= drop
+    profile = pd.DataFrame({'Time': result["time"][keep], 'Temperature': result["bean"][0, keep]})
+    first = None if np.isnan(first) or first > drop else first
+    second = None if np.isnan(second) or second > drop else second
+    return profile, first, second
+
+
+def best_schedule(target_time, target_temp, gas_levels, fan_levels, bean_type="Arabica",
+                  origin="Colombia", batch_size=0.25, charge_temp=190):
+    """Pick the constant gas/fan setting whose bean curve best tracks a target
+
+    Every gas x fan combination is simulated in a single vectorized solve.
+    Returns (gas, fan, rms_error).
+    """
+    gas_grid, fan_grid = (g.ravel() for g in np.meshgrid(gas_levels, fan_levels, indexing="ij"))
+    result = simulate_roasts(bean_type, origin, batch_size, charge_temp, gas=gas_grid, fan=fan_grid,
+                             duration=float(np.max(target_time)))
+    predicted = np.array([np.interp(target_time, result["time"], bean) for bean in result["bean"]])
+    errors = np.sqrt(((predicted - np.asarray(target_temp)) ** 2).mean(axis=1))
+    best = int(np.argmin(errors))
+    return float(gas_grid[best]), float(fan_grid[best]), float(errors[best])
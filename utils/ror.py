@@ -0,0 +1,177 @@
+from functools import lru_cache
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+@lru_cache(maxsize=None)
+def _savgol(window, polyorder):
+    """Savitzky–Golay weights for the derivative at the newest of `window` unit-spaced samples"""
+    # scipy.signal takes ~0.4 s to import; defer it from app start to the first roast
+    from scipy.signal import savgol_coeffs
+
+    return savgol_coeffs(window, polyorder, deriv=1, pos=window - 1, use='dot')
+
+
+class RateOfRise:
+    """Streaming Rate-of-Rise (°C/min) calculator
+
+    Each update costs O(samples in `span`), independent of roast length.
+    Three series are kept per sample:
+      - raw: finite difference against the previous sample
+      - ema: exponential moving average of the raw RoR
+      - smoothed: Savitzky–Golay derivative over the samples of the last
+        `span` minutes, treated as evenly spaced. The window is a time span
+        rather than a sample count so probe noise is averaged down the same
+        at any sample rate. It is NaN until the roast is `span` old: a fit
+        over the first few seconds is mostly noise.
+    """
+
+    def __init__(self, span=0.5, polyorder=2, alpha=0.3, capacity=1024):
+        if span <= 0:
+            raise ValueError("span must be positive")
+        self.span = span
+        self.polyorder = polyorder
+        self.alpha = alpha
+        self._capacity = max(int(capacity), 2)
+        self.reset()
+
+    def reset(self):
+        self._time = np.empty(self._capacity, dtype=np.float64)
+        self._temperature = np.empty(self._capacity, dtype=np.float64)
+        self._raw = np.empty(self._capacity, dtype=np.float64)
+        self._ema = np.empty(self._capacity, dtype=np.float64)
+        self._smoothed = np.empty(self._capacity, dtype=np.float64)
+        self._size = 0
+        self._start = 0
+        self._synced = 0
+        self._synced_count = 0
+        self._generation = None
+
+    def _grow(self):
+        capacity = len(self._time) * 2
+        for name in ('_time', '_temperature', '_raw', '_ema', '_smoothed'):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def update(self, time, temperature):
+        """Add one sample and return its smoothed RoR"""
+        if self._size == len(self._time):
+            self._grow()
+        i = self._size
+        self._time[i] = time
+        self._temperature[i] = temperature
+
+        if i == 0:
+            raw = ema = 0.0
+        else:
+            dt = time - self._time[i - 1]
+            raw = (temperature - self._temperature[i - 1]) / dt if dt > 0 else self._raw[i - 1]
+            ema = self._ema[i - 1] + self.alpha * (raw - self._ema[i - 1])
+
+        while time - self._time[self._start] > self.span:
+            self._start += 1
+        smoothed = np.nan
+        if time - self._time[0] >= self.span:
+            window = i + 1 - self._start
+            elapsed = time - self._time[self._start]
+            if window > self.polyorder and elapsed > 0:
+                delta = elapsed / (window - 1)
+                smoothed = _savgol(window, self.polyorder).dot(self._temperature[self._start:i + 1]) / delta
+            else:
+                # Too few samples in the span; hold the last value
+                smoothed = self._smoothed[i - 1]
+
+        self._raw[i] = raw
+        self._ema[i] = ema
+        self._smoothed[i] = smoothed
+        self._size = i + 1
+        return smoothed
+
+    def sync(self, telemetry):
+        """Consume samples added to a TelemetryBuffer since the last sync"""
+        if telemetry.generation != self._generation:
+            # Buffer was cleared or compacted; rebuild from what it holds now
+            self.reset()
+            self._generation = telemetry.generation
+        n = len(telemetry)
+        start = self._synced
+        if telemetry.count - self._synced_count > n - start and self._size:
+            # A decimating buffer overwrote its newest row in place; redo it
+            start -= 1
+            self._size -= 1
+        times = telemetry.time
+        temperatures = telemetry.temperature
+        for i in range(start, n):
+            self.update(times[i], temperatures[i])
+        self._synced = n
+        self._synced_count = telemetry.count
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def time(self):
+        return self._time[:self._size]
+
+    @property
+    def raw(self):
+        return self._raw[:self._size]
+
+    @property
+    def ema(self):
+        return self._ema[:self._size]
+
+    @property
+    def smoothed(self):
+        return self._smoothed[:self._size]
+
+    @property
+    def latest(self):
+        """Most recent smoothed RoR, or None until the roast is `span` old"""
+        if not self._size or np.isnan(self._smoothed[self._size - 1]):
+            return None
+        return self._smoothed[self._size - 1]
+
+
+def rate_of_rise(time, temperature, span=0.5, polyorder=2, alpha=0.3):
+    """Smoothed RoR for a whole recorded series at once
+
+    Vectorized equivalent of feeding every sample through
+    RateOfRise.update and reading `smoothed`, for offline analysis.
+    """
+    from scipy.signal import lfilter
+
+    time = np.asarray(time, dtype=np.float64)
+    temperature = np.asarray(temperature, dtype=np.float64)
+    n = len(time)
+    raw = np.zeros(n)
+    if n > 1:
+        dt = np.diff(time)
+        valid = dt > 0
+        raw[1:][valid] = np.diff(temperature)[valid] / dt[valid]
+        # Non-increasing timestamps repeat the previous raw value
+        last = np.maximum.accumulate(np.where(np.concatenate([[True], valid]), np.arange(n), 0))
+        raw = raw[last]
+    ema = np.zeros(n)
+    if n > 1:
+        ema[1:] = lfilter([alpha], [1, alpha - 1], raw[1:])
+
+    smoothed = np.full(n, np.nan)
+    if n:
+        index = np.arange(n)
+        start = np.searchsorted(np.maximum.accumulate(time), time - span, side='left')
+        window = index + 1 - start
+        elapsed = time - time[start]
+        ready = time - time[0] >= span
+        fit = ready & (window > polyorder) & (elapsed > 0)
+        # One pass per window length; there are only a few unless the spacing wanders
+        for length in np.unique(window[fit]):
+            rows = np.flatnonzero(fit & (window == length))
+            samples = sliding_window_view(temperature, length)[rows + 1 - length]
+            smoothed[rows] = samples @ _savgol(length, polyorder) / (elapsed[rows] / (length - 1))
+        # Too few samples in the span; hold the last value
+        smoothed = smoothed[np.maximum.accumulate(np.where(ready & ~fit, 0, index))]
+    return smoothed
@@ -0,0 +1,319 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from utils.crack_detector import CrackDetector
+from utils.data_source import DataSourcePool
+from utils.energy import EnergyMeter
+from utils.event_handler import EventHandler
+from utils.event_store import ROAST_METADATA
+from utils.metrics import metrics
+from utils.roast_model import DEFAULT_FAN, DEFAULT_GAS
+from utils.ror import RateOfRise
+from utils.telemetry import TelemetryBuffer
+
+# Roughly one hour at 10 Hz before the telemetry starts decimating
+MAX_SAMPLES_PER_ROAST = 36000
+
+# Ingest runs per reading batch on every roaster, so only 1 in INGEST_SAMPLE batches is timed
+INGEST_SAMPLE = 16
+INGEST_SECONDS = metrics.histogram(
+    "roast_telemetry_ingest_seconds",
+    "Time to ingest one batch of probe readings: crack detection, telemetry append and RoR sync",
+    sample=INGEST_SAMPLE,
+)
+
+
+class RoastSession:
+    """Server-side state of one roast on one machine
+
+    All mutation happens under `lock`; readers that need a consistent view
+    of the telemetry and RoR series should hold it too.
+    """
+
+    def __init__(self, machine_id, profile=None, first_crack_time=None, second_crack_time=None,
+                 event_handler=None, max_samples=MAX_SAMPLES_PER_ROAST, metadata=None, acoustic=None):
+        self.roast_id = uuid.uuid4().hex
+        self.machine_id = machine_id
+        self.metadata = dict(metadata or {})
+        self.profile = profile
+        self.first_crack_time = first_crack_time
+        self.second_crack_time = second_crack_time
+        self.event_handler = event_handler if event_handler is not None else EventHandler()
+        self.telemetry = TelemetryBuffer(max_samples=max_samples)
+        self.rate_of_rise = RateOfRise()
+        # Predicted crack times only sharpen the detector; the probe decides
+        self.crack_detector = CrackDetector.for_bean(
+            self.metadata.get("bean_type"), expected_times=(first_crack_time, second_crack_time)
+        )
+        self.acoustic = acoustic
+        # Burner (kW) and fan (0-1) settings, metered against every reading
+        self.burner_power = self.metadata.get("burner_power", DEFAULT_GAS)
+        self.fan_speed = self.metadata.get("fan_speed", DEFAULT_FAN)
+        batch_size = self.metadata.get("batch_size")
+        self.energy = EnergyMeter(batch_size / 1000 if batch_size else None)
+        self.lock = threading.RLock()
+        self.started_at = time.monotonic()
+        self.start_time = datetime.now()
+        self.end_time = None
+        self.ended_at = None
+        self.last_reading_at = None
+        self.version = 0
+        self._subscribers = []
+
+    @property
+    def in_progress(self):
+        return self.end_time is None
+
+    def elapsed_minutes(self, timestamp=None):
+        """Roast time at `timestamp` (monotonic), defaulting to now or the end of the roast"""
+        if timestamp is None:
+            timestamp = self.ended_at if self.ended_at is not None else time.monotonic()
+        return (timestamp - self.started_at) / 60
+
+    def _crack_event(self, current_time, temperature):
+        pops = self.acoustic.pops_until(current_time) if self.acoustic is not None else None
+        detection = self.crack_detector.update(current_time, temperature, pops)
+        if detection is None:
+            return ''
+        event, confidence = detection
+        self.event_handler.add_event(event, f"Detected at {temperature:.1f}°C (confidence {confidence:.2f})")
+        return event
+
+    def ingest(self, readings):
+        """Append probe readings, detect cracks and notify subscribers"""
+        with self.lock:
+            if not self.in_progress:
+                return
+            start = INGEST_SECONDS.start()
+            for reading in readings:
+                current_time = self.elapsed_minutes(reading.timestamp)
+                event = self._crack_event(current_time, reading.bean_temp)
+                self.telemetry.append(current_time, reading.bean_temp, event)
+                self.energy.update(current_time, self.burner_power, self.fan_speed)
+                self.last_reading_at = reading.timestamp
+            self.rate_of_rise.sync(self.telemetry)
+            self.version += 1
+            INGEST_SECONDS.stop(start)
+        self._notify()
+
+    def add_event(self, event_type, details=""):
+        """Log an operator event and mark it on the latest reading"""
+        with self.lock:
+            self.event_handler.add_event(event_type, details)
+            self.crack_detector.confirm(event_type)
+            if not self.telemetry.empty:
+                self.telemetry.append(self.telemetry.time[-1], self.telemetry.temperature[-1], event_type)
+                self.rate_of_rise.sync(self.telemetry)
+            self.version += 1
+        self._notify()
+
+    def set_controls(self, burner_power=None, fan_speed=None):
+        """Change the burner (kW) or fan (0-1) setting from now on, logging the change"""
+        with self.lock:
+            now = self.elapsed_minutes()
+            # Close the metering interval at the old setting, then step to the new one
+            self.energy.update(now, self.burner_power, self.fan_speed)
+            if burner_power is not None and burner_power != self.burner_power:
+                self.event_handler.add_event("Gas Adjustment", f"{self.burner_power:.1f} → {burner_power:.1f} kW")
+                self.burner_power = burner_power
+            if fan_speed is not None and fan_speed != self.fan_speed:
+                self.event_handler.add_event("Fan Adjustment", f"{self.fan_speed:.2f} → {fan_speed:.2f}")
+                self.fan_speed = fan_speed
+            self.energy.update(now, self.burner_power, self.fan_speed)
+            self.version += 1
+        self._notify()
+
+    def finish(self):
+        """Mark the roast ended; returns False if it already had"""
+        with self.lock:
+            if not self.in_progress:
+                return False
+            self.ended_at = time.monotonic()
+            self.end_time = datetime.now()
+            if self.acoustic is not None:
+                self.acoustic.close()
+            self.version += 1
+        self._notify()
+        return True
+
+    def subscribe(self, callback):
+        """Call callback(session) after every update; returns an unsubscribe function"""
+        self._subscribers.append(callback)
+        return lambda: self._subscribers.remove(callback)
+
+    def _notify(self):
+        for callback in list(self._subscribers):
+            callback(self)
+
+
+class SessionManager:
+    """Runs many concurrent roasts, keyed by machine ID
+
+    A polling thread waits on every roaster's data source at once and hands
+    each machine's new readings to a worker pool, so one slow session does
+    not hold up the others. Each session has at most one batch in flight;
+    readings that arrive meanwhile queue behind it, keeping their order. Sessions outlive browser tabs: any dashboard can
+    look up or subscribe to any machine.
+    """
+
+    def __init__(self, workers=4, poll_interval=0.1, max_samples=MAX_SAMPLES_PER_ROAST,
+                 event_store=None, archive=None, roast_index=None):
+        self.poll_interval = poll_interval
+        self.event_store = event_store
+        self.archive = archive
+        self.roast_index = roast_index
+        self.max_samples = max_samples
+        self._sessions = {}
+        self._event_handlers = {}
+        # Session -> readings waiting for its in-flight batch to finish
+        self._pending = {}
+        self._sources = DataSourcePool()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="roast-worker")
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="roast-sessions", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(1.0)
+        self._sources.close()
+        self._executor.shutdown(wait=False)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.tick(self.poll_interval)
+            except RuntimeError:
+                # Worker pool shut down, e.g. at interpreter exit
+                break
+
+    def tick(self, timeout=0.0):
+        """Dispatch one round of readings to the worker pool; returns the number of machines updated"""
+        batches = self._sources.read_all(timeout)
+        updated = 0
+        for machine_id, readings in batches.items():
+            session = self._sessions.get(machine_id)
+            if session is None:
+                continue
+            updated += 1
+            with self._lock:
+                pending = self._pending.get(session)
+                if pending is not None:
+                    # The worker ingesting this session's last batch takes these next
+                    pending.extend(readings)
+                    continue
+                self._pending[session] = []
+            self._executor.submit(self._ingest, session, readings)
+        return updated
+
+    def _ingest(self, session, readings):
+        try:
+            while True:
+                session.ingest(readings)
+                with self._lock:
+                    readings = self._pending[session]
+                    if not readings:
+                        del self._pending[session]
+                        return
+                    self._pending[session] = []
+        except BaseException:
+            # Don't leave the session marked busy, or it never gets another batch
+            with self._lock:
+                self._pending.pop(session, None)
+            raise
+
+    def event_handler(self, machine_id):
+        """Event log for a machine, kept across its roasts"""
+        with self._lock:
+            handler = self._event_handlers.get(machine_id)
+            if handler is None:
+                handler = EventHandler(self.event_store, machine_id)
+                self._event_handlers[machine_id] = handler
+            return handler
+
+    def start_roast(self, machine_id, source, profile=None, first_crack_time=None, second_crack_time=None,
+                    acoustic=None, **metadata):
+        """Begin a new roast on a machine, reading from `source`
+
+        The source's device_id must be the machine ID; `acoustic` is an
+        optional microphone (e.g. AcousticFileSource) for the crack
+        detector. Keyword metadata (bean_type, origin, roast_level,
+        batch_size, ...) is stored with the roast in the event store and
+        the archive.
+        """
+        self.end_roast(machine_id)
+        event_handler = self.event_handler(machine_id)
+        session = RoastSession(
+            machine_id, profile, first_crack_time, second_crack_time,
+            event_handler=event_handler, max_samples=self.max_samples, metadata=metadata, acoustic=acoustic,
+        )
+        event_handler.roast_id = session.roast_id
+        if self.event_store is not None:
+            self.event_store.register_roast(
+                session.roast_id, machine_id, started_at=session.start_time,
+                **{key: metadata.get(key) for key in ROAST_METADATA}
+            )
+        with self._lock:
+            self._sessions[machine_id] = session
+        self._sources.add(source)
+        return session
+
+    def end_roast(self, machine_id):
+        """Stop reading from a machine and mark its roast finished"""
+        session = self._sessions.get(machine_id)
+        if session is None:
+            return None
+        # Only the caller that actually ends the roast logs and archives it
+        if session.finish():
+            self._sources.remove(machine_id)
+            session.event_handler.add_event(
+                "Roast Completed", f"Duration: {session.elapsed_minutes():.1f} minutes"
+            )
+            session.event_handler.roast_id = None
+            if self.archive is not None:
+                self._archive(session)
+        return session
+
+    def _archive(self, session):
+        metadata = dict(
+            session.metadata,
+            machine_id=session.machine_id,
+            # Stored as text, the same in the archive and the similarity index
+            start_time=session.start_time.isoformat(),
+            end_time=session.end_time.isoformat(),
+            duration=session.elapsed_minutes(),
+            predicted_first_crack=session.first_crack_time,
+            predicted_second_crack=session.second_crack_time,
+            **session.energy.totals(),
+        )
+        with session.lock:
+            if session.telemetry.empty:
+                return
+            self.archive.save(session.roast_id, session.telemetry, metadata)
+            if self.roast_index is not None:
+                self.roast_index.add(
+                    session.roast_id, session.telemetry.time, session.telemetry.temperature,
+                    dict(metadata, roast_id=session.roast_id)
+                )
+
+    def get(self, machine_id):
+        return self._sessions.get(machine_id)
+
+    def machines(self, active=False):
+        with self._lock:
+            return [m for m, s in self._sessions.items() if s.in_progress or not active]
+
+    def subscribe(self, machine_id, callback):
+        """Subscribe to the current roast on a machine"""
+        return self._sessions[machine_id].subscribe(callback)
@@ -0,0 +1,163 @@
+import threading
+
+import numpy as np
+
+
+def resample(time, temperature, grid):
+    """Interpolate a curve onto a time grid, holding the last value past its end"""
+    return np.interp(grid, time, temperature)
+
+
+class RoastIndex:
+    """k-nearest-neighbour search over roast curves
+
+    Curves are resampled onto a fixed time grid and stored as rows of a
+    float32 matrix, centred on a reference curve (the mean of the first
+    ones added) to keep float32 precision. Any common offset leaves the
+    distances unchanged, so the reference never moves and new rows,
+    with their prefix norms, are simply appended. The prefix norms let an
+    unfinished roast be matched on just the part observed so far with a
+    single matrix-vector product. Full-length queries can optionally run in
+    a PCA embedding of `n_components`, fitted on the first such query and
+    again whenever the library has doubled since.
+    """
+
+    def __init__(self, horizon=20.0, points=120, n_components=None, capacity=1024):
+        self.grid = np.linspace(0, horizon, points)
+        self.n_components = n_components
+        self._centred = np.empty((capacity, points), dtype=np.float32)
+        self._prefix_norms = np.empty((capacity, points), dtype=np.float64)
+        self._ids = []
+        self._known = set()
+        self._metadata = []
+        self._reference = None
+        self._components = None
+        self._fitted = 0
+        self._embedding = np.empty((0, n_components or 0), dtype=np.float32)
+        self._lock = threading.Lock()
+        # Cleared while from_archive(background=True) is still loading
+        self.ready = threading.Event()
+        self.ready.set()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, roast_id, time, temperature, metadata=None):
+        self.add_many([roast_id], [resample(time, temperature, self.grid)], [metadata])
+
+    def add_many(self, roast_ids, curves, metadata=None):
+        """Add curves already sampled on self.grid (an array of shape (n, points))
+
+        Roast IDs already in the index are skipped, so a roast archived
+        while the archive is being loaded isn't indexed twice.
+        """
+        curves = np.asarray(curves, dtype=np.float32)
+        metadata = list(metadata) if metadata is not None else [None] * len(curves)
+        with self._lock:
+            new = [i for i, roast_id in enumerate(roast_ids) if roast_id is None or roast_id not in self._known]
+            if len(new) < len(roast_ids):
+                roast_ids, curves, metadata = [roast_ids[i] for i in new], curves[new], [metadata[i] for i in new]
+            if not len(curves):
+                return
+            if self._reference is None:
+                self._reference = curves.mean(axis=0)
+            n = len(self._ids)
+            needed = n + len(curves)
+            if needed > len(self._centred):
+                # New arrays rather than in-place, so queries holding views stay valid
+                capacity = max(needed, 2 * len(self._centred))
+                for name in ('_centred', '_prefix_norms'):
+                    old = getattr(self, name)
+                    grown = np.empty((capacity, len(self.grid)), dtype=old.dtype)
+                    grown[:n] = old[:n]
+                    setattr(self, name, grown)
+            centred = curves - self._reference
+            self._centred[n:needed] = centred
+            self._prefix_norms[n:needed] = np.cumsum(centred.astype(np.float64) ** 2, axis=1)
+            self._ids.extend(roast_ids)
+            self._known.update(roast_ids)
+            self._metadata.extend(metadata)
+
+    def _embed(self, n):
+        # PCA is refitted once the library has doubled; rows added since are projected
+        if self._components is None or n >= 2 * self._fitted:
+            centred = self._centred[:n]
+            _, _, vt = np.linalg.svd(centred - centred.mean(axis=0), full_matrices=False)
+            self._components = vt[:self.n_components]
+            self._fitted = n
+            self._embedding = centred @ self._components.T
+        elif len(self._embedding) < n:
+            added = self._centred[len(self._embedding):n] @ self._components.T
+            self._embedding = np.concatenate([self._embedding, added])
+        return self._components, self._embedding
+
+    def query(self, time, temperature, k=5, partial=True):
+        """Return [(roast_id, distance, metadata)] for the k closest curves
+
+        With partial=True only grid points up to the last observed time are
+        compared, so a roast in progress is matched on its prefix; otherwise
+        the curve is treated as finished and compared over the whole grid.
+        Distance is the RMS temperature difference over the compared points.
+        """
+        observed = len(self.grid)
+        if partial and len(time):
+            observed = int(np.searchsorted(self.grid, time[-1], side='right'))
+        if observed == 0 or not len(time):
+            return []
+
+        with self._lock:
+            n = len(self._ids)
+            if not n:
+                return []
+            # Rows are only ever appended past n, so these views stay consistent
+            ids, metadata = self._ids[:n], self._metadata[:n]
+            centred, prefix_norms, reference = self._centred[:n], self._prefix_norms[:n], self._reference
+            components = embedding = None
+            full = observed == len(self.grid)
+            if full and self.n_components and n > self.n_components:
+                components, embedding = self._embed(n)
+
+        q = resample(time, temperature, self.grid[:observed]) - reference[:observed]
+        if components is not None:
+            diff = embedding - components @ q
+            distances = np.einsum('ij,ij->i', diff, diff)
+        else:
+            distances = prefix_norms[:, observed - 1] - 2 * (centred[:, :observed] @ q) + q @ q
+        distances = np.sqrt(np.maximum(distances, 0) / observed)
+
+        k = min(k, len(distances))
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.argsort(distances[nearest])]
+        return [(ids[i], float(distances[i]), metadata[i]) for i in nearest]
+
+    @classmethod
+    def from_archive(cls, archive, background=False, batch=256, **kwargs):
+        """Index every roast in a RoastArchive
+
+        With background=True the index is returned empty straight away and
+        filled from a daemon thread, `batch` roasts at a time, so a large
+        library doesn't hold up the caller; queries meanwhile search the
+        roasts loaded so far, and `ready` is set once all are in.
+        """
+        index = cls(**kwargs)
+        if background:
+            index.ready.clear()
+            threading.Thread(
+                target=index._load, args=(archive, batch), name="roast-index-load", daemon=True
+            ).start()
+        else:
+            index._load(archive, batch)
+        return index
+
+    def _load(self, archive, batch):
+        try:
+            paths = archive.paths()
+            for start in range(0, len(paths), batch):
+                loaded = [archive.load_curve(path) for path in paths[start:start + batch]]
+                self.add_many(
+                    [metadata.get("roast_id") for metadata, _, _ in loaded],
+                    [resample(time, temperature, self.grid) for _, time, temperature in loaded],
+                    [metadata for metadata, _, _ in loaded],
+                )
+        finally:
+            self.ready.set()
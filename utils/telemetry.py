@@ -0,0 +1,201 @@
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['Time', 'Temperature', 'Event']
+
+
+class TelemetryBuffer:
+    """Growable columnar store for roast telemetry samples
+
+    Samples are written into preallocated NumPy columns that double in
+    size when full, so appending is O(1) amortized instead of copying the
+    whole history like ``pd.concat`` does. Event names are interned into a
+    small lookup table and stored per sample as integer codes (0 = no event).
+
+    With `max_samples` set, a full buffer halves its resolution instead of
+    growing: it keeps every `stride`-th sample (plus every sample carrying an
+    event, and always the newest one), doubling the stride each time, so
+    memory stays bounded however long the roast runs. Rows carrying events
+    are never dropped, so a roast with about `max_samples` events grows past
+    it, to at most one row per event plus the first and newest samples. `generation` is bumped whenever existing rows change this way so
+    derived series know to rebuild.
+    """
+
+    def __init__(self, capacity=1024, max_samples=None):
+        if max_samples is not None and max_samples < 3:
+            raise ValueError("max_samples must be at least 3: the first and newest samples are always kept")
+        self.max_samples = max_samples
+        if max_samples is not None:
+            capacity = min(capacity, max_samples)
+        self._capacity = max(int(capacity), 1)
+        self._allocate(self._capacity)
+        self._event_names = ['']
+        self._event_codes = {'': 0}
+        self._event_index = {}
+        self._size = 0
+        self._count = 0
+        self._stride = 1
+        self._provisional = False
+        self.generation = 0
+
+    def _allocate(self, capacity):
+        self._time = np.empty(capacity, dtype=np.float64)
+        self._temperature = np.empty(capacity, dtype=np.float64)
+        self._event = np.zeros(capacity, dtype=np.int16)
+        self._seq = np.zeros(capacity, dtype=np.int64)
+
+    def _grow(self):
+        capacity = len(self._time) * 2
+        # Past the limit only when compacting can't make room for events
+        if self.max_samples is not None and len(self._time) < self.max_samples:
+            capacity = min(capacity, self.max_samples)
+        for name in ('_time', '_temperature', '_event', '_seq'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def _compact(self):
+        # New arrays rather than in-place, so earlier views stay valid
+        n = self._size
+        stride = self._stride
+        while True:
+            # Event rows may fill most of the buffer; coarsen until something goes
+            stride *= 2
+            keep = (self._seq[:n] % stride == 0) | (self._event[:n] != 0)
+            keep[n - 1] = True
+            rows = np.flatnonzero(keep)
+            if len(rows) < len(self._time):
+                break
+            if stride > self._count:
+                # Nothing left but events and the first sample; rather than
+                # grow, let the next reading replace a plain newest one
+                last = n - 1
+                if self._event[last] != 0 or self._seq[last] == 0:
+                    return False
+                self._provisional = True
+                return True
+        for name in ('_time', '_temperature', '_event', '_seq'):
+            old = getattr(self, name)
+            new = np.zeros(len(old), dtype=old.dtype)
+            new[:len(rows)] = old[rows]
+            setattr(self, name, new)
+        self._event_index = {
+            code: int(np.searchsorted(rows, i)) for code, i in self._event_index.items()
+        }
+        self._size = len(rows)
+        self._stride = stride
+        last = self._size - 1
+        self._provisional = self._event[last] == 0 and self._seq[last] % stride != 0
+        self.generation += 1
+        return True
+
+    def intern(self, event):
+        """Return the integer code for an event name, registering it if new"""
+        code = self._event_codes.get(event)
+        if code is None:
+            code = len(self._event_names)
+            self._event_names.append(event)
+            self._event_codes[event] = code
+        return code
+
+    def append(self, time, temperature, event=''):
+        """Append one sample; returns its row index"""
+        seq = self._count
+        self._count += 1
+        if not self._provisional and self._size == len(self._time):
+            at_limit = self.max_samples is not None and self._size >= self.max_samples
+            if not (at_limit and self._compact()):
+                self._grow()
+        if self._provisional:
+            # The last row was only kept as the newest reading; replace it
+            i = self._size - 1
+        else:
+            i = self._size
+            self._size = i + 1
+        code = self.intern(event or '')
+        self._time[i] = time
+        self._temperature[i] = temperature
+        self._event[i] = code
+        self._seq[i] = seq
+        if code and code not in self._event_index:
+            self._event_index[code] = i
+        # Past the limit only event rows are kept, plus the newest reading
+        overflowing = self.max_samples is not None and len(self._time) > self.max_samples
+        self._provisional = code == 0 and (seq % self._stride != 0 or overflowing)
+        return i
+
+    def clear(self):
+        """Drop all samples
+
+        Fresh columns are allocated so views handed out earlier keep
+        their data instead of being overwritten by new samples.
+        """
+        self._allocate(self._capacity)
+        self._event_index = {}
+        self._size = 0
+        self._count = 0
+        self._stride = 1
+        self._provisional = False
+        self.generation += 1
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def count(self):
+        """Total samples appended since the last clear, including decimated ones"""
+        return self._count
+
+    @property
+    def empty(self):
+        return self._size == 0
+
+    @property
+    def time(self):
+        """Zero-copy view of the sample times (minutes)"""
+        return self._time[:self._size]
+
+    @property
+    def temperature(self):
+        """Zero-copy view of the sample temperatures (°C)"""
+        return self._temperature[:self._size]
+
+    @property
+    def event_codes(self):
+        """Zero-copy view of the per-sample event codes"""
+        return self._event[:self._size]
+
+    @property
+    def event_names(self):
+        """Interned event names, indexed by event code"""
+        return list(self._event_names)
+
+    def has_event(self, event):
+        """Check whether an event has been recorded, without scanning"""
+        return self._event_codes.get(event) in self._event_index
+
+    def first_event(self, event):
+        """Return (time, temperature) of the first occurrence of an event, or None"""
+        i = self._event_index.get(self._event_codes.get(event))
+        if i is None:
+            return None
+        return self._time[i], self._temperature[i]
+
+    def to_frame(self):
+        """Return the samples as a DataFrame
+
+        The Time and Temperature columns wrap the underlying arrays without
+        copying; Event is a categorical built from the interned name table.
+        """
+        events = pd.Categorical.from_codes(self.event_codes, categories=self._event_names)
+        return pd.DataFrame(
+            {'Time': self.time, 'Temperature': self.temperature, 'Event': events},
+            columns=COLUMNS,
+            copy=False,
+        )
+
+    def to_csv(self, **kwargs):
+        """Serialize the samples to CSV"""
+        kwargs.setdefault('index', False)
+        return self.to_frame().to_csv(**kwargs)
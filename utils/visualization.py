@@ -1,7 +1,11 @@
-import plotly.express as px
+import numpy as np
+import plotly.graph_objects as go
 
 def plot_roast_profile(profile_df):
     """Create an interactive plot of the roast profile"""
+    # plotly.express is slow to import and only needed here
+    import plotly.express as px
+
     fig = px.line(
         profile_df, 
         x='Time', 
@@ -24,3 +28,235 @@ def plot_roast_profile(profile_df):
     )
     
     return fig
+
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets downsampling
+
+    Returns the indices of at most `threshold` points that preserve the
+    visual shape of the series. The first and last points are always kept.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    indices = np.empty(threshold, dtype=np.intp)
+    indices[0] = 0
+    indices[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a])
+                      - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+class RoastFigure:
+    """Persistent target-vs-actual roast chart
+
+    The static layers (target profile, phase bands, predicted crack lines
+    and axes) are built once per profile. update() only replaces the data
+    of the actual, event and RoR traces, downsampling them with LTTB once
+    they exceed `max_points` so the figure payload stays bounded.
+    """
+
+    ACTUAL, EVENTS, ROR = 1, 2, 3
+    HISTORY_POINTS = 100
+
+    def __init__(self, target_profile, first_crack_time=None, second_crack_time=None, max_points=500,
+                 static_layers=None):
+        # Held, not just its id(), so a later profile can't reuse the id and pass as this one
+        self.target_profile = target_profile
+        self.crack_times = (first_crack_time, second_crack_time)
+        self.max_points = max_points
+        self.history_key = None
+        if static_layers is None:
+            static_layers = self.static_layers(first_crack_time, second_crack_time)
+        self.fig = go.Figure(static_layers)
+        self.fig.data[0].update(x=target_profile['Time'], y=target_profile['Temperature'])
+
+    def matches(self, target_profile, first_crack_time=None, second_crack_time=None):
+        return target_profile is self.target_profile and self.crack_times == (first_crack_time, second_crack_time)
+
+    @staticmethod
+    def static_layers(first_crack_time=None, second_crack_time=None):
+        """The figure minus the target data, as a plain (picklable) figure dict
+
+        Building these through plotly is most of the cost of a new figure
+        and they depend only on the predicted crack times, so callers may
+        cache the dict and pass it to every RoastFigure.
+        """
+        fig = go.Figure()
+        
+        # Plot target profile
+        fig.add_trace(go.Scatter(
+            x=[], y=[],
+            mode='lines',
+            name='Target Profile',
+            line=dict(color='#6F4E37', width=3, dash='dash'),
+            hovertemplate='Time: %{x:.1f} min<br>Temp: %{y:.1f}°C'
+        ))
+        
+        # Placeholders for the live traces, filled in by update()
+        fig.add_trace(go.Scatter(
+            x=[], y=[],
+            mode='lines+markers',
+            name='Actual Temperature',
+            visible=False,
+            line=dict(color='#C4A484', width=3),
+            marker=dict(size=6, color='#6F4E37'),
+            hovertemplate='Time: %{x:.1f} min<br>Temp: %{y:.1f}°C'
+        ))
+        fig.add_trace(go.Scatter(
+            x=[], y=[],
+            mode='markers',
+            name='Events',
+            visible=False,
+            marker=dict(
+                color='#FF0000',
+                size=12,
+                symbol='diamond',
+                line=dict(width=2, color='DarkSlateGrey')
+            ),
+            hovertemplate='<b>%{text}</b><br>Time: %{x:.1f} min<br>Temp: %{y:.1f}°C'
+        ))
+        fig.add_trace(go.Scatter(
+            x=[], y=[],
+            mode='lines',
+            name='Rate of Rise (°C/min)',
+            visible=False,
+            yaxis='y2',
+            line=dict(color='blue', width=2, dash='dot'),
+            hovertemplate='Time: %{x:.1f} min<br>RoR: %{y:.1f}°C/min'
+        ))
+        
+        # Add roast phase annotations
+        fig.add_hrect(y0=150, y1=180, line_width=0, fillcolor="yellow", opacity=0.1, 
+                     annotation_text="Drying Phase", annotation_position="top left")
+        fig.add_hrect(y0=180, y1=210, line_width=0, fillcolor="orange", opacity=0.1, 
+                     annotation_text="Maillard Phase", annotation_position="top left")
+        fig.add_hrect(y0=210, y1=230, line_width=0, fillcolor="red", opacity=0.1, 
+                     annotation_text="Development Phase", annotation_position="top left")
+        
+        # Add predicted crack times if available
+        if first_crack_time:
+            fig.add_vline(x=first_crack_time, line_dash="dot", 
+                         line_color="green", annotation_text="Predicted 1st Crack")
+        
+        if second_crack_time:
+            fig.add_vline(x=second_crack_time, line_dash="dot", 
+                         line_color="brown", annotation_text="Predicted 2nd Crack")
+        
+        fig.update_layout(
+            title='Roast Profile: Target vs Actual',
+            xaxis_title='Time (minutes)',
+            yaxis_title='Temperature (°C)',
+            plot_bgcolor='rgba(240,240,240,0.9)',
+            paper_bgcolor='rgba(240,240,240,0.5)',
+            hovermode='x unified',
+            legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1),
+            height=500,
+            yaxis2=dict(
+                title='Rate of Rise (°C/min)',
+                overlaying='y',
+                side='right',
+                showgrid=False
+            )
+        )
+        return fig.to_dict()
+
+    def set_history(self, key, curves):
+        """Overlay archived (metadata, time, temperature) curves, rebuilding only when key changes"""
+        if key == self.history_key:
+            return
+        self.history_key = key
+        with self.fig.batch_update():
+            self.fig.data = self.fig.data[:self.ROR + 1]
+            for i, (metadata, time, temperature) in enumerate(curves):
+                indices = lttb(time, temperature, self.HISTORY_POINTS)
+                self.fig.add_trace(go.Scatter(
+                    x=time[indices],
+                    y=temperature[indices],
+                    mode='lines',
+                    name='Past Roasts',
+                    legendgroup='history',
+                    showlegend=i == 0,
+                    line=dict(color='rgba(111,78,55,0.15)', width=1),
+                    hoverinfo='skip'
+                ))
+
+    def _downsample(self, x, y):
+        indices = lttb(x, y, self.max_points)
+        if len(indices) == len(x):
+            return x, y
+        return x[indices], y[indices]
+
+    def update(self, telemetry=None, rate_of_rise=None):
+        """Refresh the live traces from a TelemetryBuffer and RateOfRise"""
+        actual, events, ror = (self.fig.data[i] for i in (self.ACTUAL, self.EVENTS, self.ROR))
+        with self.fig.batch_update():
+            if telemetry is not None and not telemetry.empty:
+                actual.x, actual.y = self._downsample(telemetry.time, telemetry.temperature)
+                actual.visible = True
+                
+                # Mark events
+                codes = telemetry.event_codes
+                mask = codes != 0
+                has_events = bool(mask.any())
+                events.visible = has_events
+                if has_events:
+                    events.x = telemetry.time[mask]
+                    events.y = telemetry.temperature[mask]
+                    events.text = np.take(telemetry.event_names, codes[mask])
+            else:
+                actual.visible = events.visible = False
+            
+            if rate_of_rise is not None and len(rate_of_rise) >= 2:
+                ror.x, ror.y = self._downsample(rate_of_rise.time, rate_of_rise.smoothed)
+                ror.visible = True
+            else:
+                ror.visible = False
+        return self.fig
+
+
+def plot_outcome_heatmap(outcomes, values, label, spread=None, current=None):
+    """Heatmap of a per-cell outcome over charge temperature x development time
+
+    spread is an optional (low, high) pair of arrays shown on hover, and
+    current an optional (development time, charge temperature) to mark.
+    """
+    hover = 'Charge %{y:.0f}°C, development %{x:.0f}%<br>' + label + ': %{z:.2f}'
+    customdata = None
+    if spread is not None:
+        customdata = np.stack(spread, axis=-1)
+        hover += ' (%{customdata[0]:.2f} to %{customdata[1]:.2f})'
+    fig = go.Figure(go.Heatmap(
+        x=outcomes.development_times,
+        y=outcomes.charge_temps,
+        z=values,
+        customdata=customdata,
+        colorscale='YlOrBr',
+        colorbar=dict(title=label),
+        hovertemplate=hover + '<extra></extra>'
+    ))
+    if current is not None:
+        fig.add_trace(go.Scatter(
+            x=[current[0]], y=[current[1]],
+            mode='markers',
+            name='Current Settings',
+            marker=dict(symbol='x', size=14, color='#1f77b4', line=dict(width=2)),
+            hovertemplate='Current settings<extra></extra>'
+        ))
+    fig.update_layout(
+        xaxis_title='Development Time (%)',
+        yaxis_title='Charge Temperature (°C)',
+        height=450,
+        showlegend=False
+    )
+    return fig